@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+
+@dataclass
+class BackupResult:
+	path: str
+	pages: int
+	elapsed: float
+	size_bytes: int
+	integrity: str
+	removed: List[str]
+
+	@property
+	def pages_per_second(self) -> float:
+		return self.pages / self.elapsed if self.elapsed > 0 else float(self.pages)
+
+
+class BackupError(RuntimeError):
+	pass
+
+
+def _backup_pattern(name: str) -> "re.Pattern[str]":
+	# name-YYYYmmdd-HHMMSS[-N].db[.gz]；同一秒内的多次备份以 -N 区分
+	return re.compile(re.escape(name) + r"-(\d{8}-\d{6})(?:-(\d+))?\.db(?:\.gz)?$")
+
+
+def _rotate(dest_dir: Path, name: str, keep: int) -> List[str]:
+	# 按 (时间戳, 序号) 倒序；精确匹配避免误删其它分片的备份
+	pattern = _backup_pattern(name)
+	backups = []
+	for p in dest_dir.iterdir():
+		m = pattern.match(p.name)
+		if m and p.is_file():
+			backups.append(((m.group(1), int(m.group(2) or 0)), p))
+	backups.sort(key=lambda item: item[0], reverse=True)
+	removed = []
+	for _, old in backups[keep:]:
+		old.unlink()
+		removed.append(old.as_posix())
+	return removed
+
+
+def _publish(tmp: Path, dest: Path, name: str, suffix: str) -> Path:
+	# 硬链接到最终文件名再删除临时文件：目标已存在时 link 失败而不是覆盖，换下一个序号重试
+	stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+	seq = 0
+	while True:
+		final = dest / (f"{name}-{stamp}{suffix}" if seq == 0 else f"{name}-{stamp}-{seq}{suffix}")
+		try:
+			os.link(tmp, final)
+		except FileExistsError:
+			seq += 1
+			continue
+		except OSError:
+			# CIFS/部分 FUSE 等不支持硬链接：先用 O_EXCL 创建空文件占住文件名，再用 replace 覆盖占位文件
+			try:
+				fd = os.open(final, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+			except FileExistsError:
+				seq += 1
+				continue
+			os.close(fd)
+			try:
+				os.replace(tmp, final)
+			except BaseException:
+				final.unlink(missing_ok=True)
+				raise
+			return final
+		tmp.unlink()
+		return final
+
+
+def backup_database(
+	source_path: str,
+	dest_dir: str,
+	name: str = "certmon",
+	pages_per_step: int = 256,
+	sleep_seconds: float = 0.05,
+	compress: bool = False,
+	verify: bool = True,
+	keep: Optional[int] = None,
+) -> BackupResult:
+	# 使用 sqlite3 backup API 分步复制：每步只短暂持有源库读锁，步间休眠让 Web 与提醒任务的写入穿插进行
+	dest = Path(dest_dir)
+	dest.mkdir(parents=True, exist_ok=True)
+	token = uuid.uuid4().hex
+	tmp = dest / f".{name}-{token}.db.tmp"
+	gz_tmp = dest / f".{name}-{token}.db.gz.tmp"
+	pages = 0
+
+	def progress(status: int, remaining: int, total: int) -> None:
+		nonlocal pages
+		pages = total
+		if remaining and sleep_seconds > 0:
+			time.sleep(sleep_seconds)
+
+	started = time.monotonic()
+	try:
+		src = sqlite3.connect(source_path)
+		dst = sqlite3.connect(tmp.as_posix())
+		try:
+			src.backup(dst, pages=max(1, int(pages_per_step)), progress=progress)
+			integrity = "skipped"
+			if verify:
+				integrity = str(dst.execute("PRAGMA integrity_check").fetchone()[0])
+		finally:
+			dst.close()
+			src.close()
+		if verify and integrity != "ok":
+			raise BackupError(f"备份完整性校验失败: {integrity}")
+
+		if compress:
+			with tmp.open("rb") as fin, gzip.open(gz_tmp, "wb", compresslevel=6) as fout:
+				shutil.copyfileobj(fin, fout, 1024 * 1024)
+			tmp.unlink()
+			final = _publish(gz_tmp, dest, name, ".db.gz")
+		else:
+			final = _publish(tmp, dest, name, ".db")
+	except BaseException:
+		# 任何失败（sqlite3.Error、磁盘满、Ctrl-C）都不在目标目录留下临时文件
+		for leftover in (tmp, gz_tmp):
+			leftover.unlink(missing_ok=True)
+		raise
+	elapsed = time.monotonic() - started
+
+	removed = _rotate(dest, name, keep) if keep is not None and keep > 0 else []
+	return BackupResult(
+		path=final.as_posix(),
+		pages=pages,
+		elapsed=elapsed,
+		size_bytes=final.stat().st_size,
+		integrity=integrity,
+		removed=removed,
+	)
@@ -1,16 +1,25 @@
 from __future__ import annotations
 
 import argparse
+import csv
 import os
+import sqlite3
 import sys
+import time
 from datetime import date, datetime
 from pathlib import Path
 
 from .config import Config, SMTPConfig, load_config, try_load_config
-from .db import Database
+from .db import ArchivedCertificate, Database
 from .dateutil import add_months
-from .logic import send_due_reminders
-from .emailer import send_email
+from .logic import _resolve_smtp_config, send_due_reminders_parallel, send_due_reminders_sharded
+from .sharding import ShardedDatabase
+from .emailer import build_message, make_transport
+from .scanner import scan_directory
+from .prober import probe_all
+from .recompute import recompute_expiry
+from .forecast import FORECAST_MODES, build_forecast
+from .backup import BackupError, backup_database
 
 
 def _parse_date(yyyy_mm_dd: str) -> date:
@@ -20,9 +29,27 @@ def _parse_date(yyyy_mm_dd: str) -> date:
 		raise argparse.ArgumentTypeError(f"无效日期格式: {yyyy_mm_dd}，期望 YYYY-MM-DD") from e
 
 
-def _resolve_db_path(config: Config | None) -> str:
+def _non_negative_int(value: str) -> int:
+	try:
+		n = int(value)
+	except ValueError as e:
+		raise argparse.ArgumentTypeError(f"无效整数: {value}") from e
+	if n < 0:
+		raise argparse.ArgumentTypeError(f"必须为非负整数: {value}")
+	return n
+
+
+def _resolve_db_path(config: Config | None, shard: str | None = None) -> str:
 	# 统一与 Web 一致：相对路径一律以项目根目录（包上级目录）为基准
-	raw_path = config.app.database_path if config is not None else "data/certmon.db"
+	if config is not None and config.app.shards:
+		name = shard or config.app.default_shard or next(iter(config.app.shards))
+		if name not in config.app.shards:
+			raise argparse.ArgumentTypeError(f"未知分片: {name}（可用: {', '.join(config.app.shards)}）")
+		raw_path = config.app.shards[name]
+	elif shard is not None:
+		raise argparse.ArgumentTypeError("配置中未定义分片（app.shards），不能使用 --shard")
+	else:
+		raw_path = config.app.database_path if config is not None else "data/certmon.db"
 	p = Path(raw_path)
 	if p.is_absolute():
 		return p.as_posix()
@@ -30,6 +57,16 @@ def _resolve_db_path(config: Config | None) -> str:
 	return (base_dir / p).as_posix()
 
 
+def _open_sharded(config: Config | None, shard: str | None) -> ShardedDatabase | None:
+	# 配置了分片且未用 --shard 指定单个分片时，返回扇出查询层
+	if config is None or not config.app.shards or shard is not None:
+		return None
+	return ShardedDatabase(
+		{name: Database(_resolve_db_path(config, name)) for name in config.app.shards},
+		config.app.default_shard,
+	)
+
+
 def _resolve_config_path(config_path: str) -> str:
 	# 将相对配置路径按项目根目录解析，避免不同工作目录造成读取不同文件
 	p = Path(config_path)
@@ -41,15 +78,21 @@ def _resolve_config_path(config_path: str) -> str:
 
 def cmd_init_db(args: argparse.Namespace) -> int:
 	config = try_load_config(_resolve_config_path(args.config))
-	db = Database(_resolve_db_path(config))
+	sharded = _open_sharded(config, args.shard)
+	if sharded is not None:
+		sharded.initialize_schema()
+		for name in sharded.names:
+			print(f"数据库已初始化: [{name}] {Path(_resolve_db_path(config, name)).as_posix()}")
+		return 0
+	db = Database(_resolve_db_path(config, args.shard))
 	db.initialize_schema()
-	print(f"数据库已初始化: {Path(_resolve_db_path(config)).as_posix()}")
+	print(f"数据库已初始化: {Path(_resolve_db_path(config, args.shard)).as_posix()}")
 	return 0
 
 
 def cmd_add(args: argparse.Namespace) -> int:
 	config = try_load_config(_resolve_config_path(args.config))
-	db = Database(_resolve_db_path(config))
+	db = Database(_resolve_db_path(config, args.shard))
 	if args.expires is not None:
 		expires_on = _parse_date(args.expires)
 		acquired_on = expires_on
@@ -72,7 +115,18 @@ def cmd_add(args: argparse.Namespace) -> int:
 
 def cmd_list(args: argparse.Namespace) -> int:
 	config = try_load_config(_resolve_config_path(args.config))
-	db = Database(_resolve_db_path(config))
+	sharded = _open_sharded(config, args.shard)
+	if sharded is not None:
+		merged = sharded.list_certificates()
+		if not merged:
+			print("暂无记录")
+			return 0
+		print("shard\tid\tname\temail\tacquired_on\tmonths\texpires_on\tlast_reminded_on")
+		for shard_name, r in merged:
+			last_day = r.last_reminded_on.strftime("%Y-%m-%d") if r.last_reminded_on else "-"
+			print(f"{shard_name}\t{r.id}\t{r.name}\t{r.email}\t{r.acquired_on.strftime('%Y-%m-%d')}\t{r.valid_months}\t{r.expires_on.strftime('%Y-%m-%d')}\t{last_day}")
+		return 0
+	db = Database(_resolve_db_path(config, args.shard))
 	records = db.list_certificates()
 	if not records:
 		print("暂无记录")
@@ -86,7 +140,7 @@ def cmd_list(args: argparse.Namespace) -> int:
 
 def cmd_remove(args: argparse.Namespace) -> int:
 	config = try_load_config(_resolve_config_path(args.config))
-	db = Database(_resolve_db_path(config))
+	db = Database(_resolve_db_path(config, args.shard))
 	success = db.remove_certificate(int(args.id))
 	if success:
 		print("已删除")
@@ -97,15 +151,34 @@ def cmd_remove(args: argparse.Namespace) -> int:
 
 def cmd_send_reminders(args: argparse.Namespace) -> int:
 	config = load_config(_resolve_config_path(args.config))
-	db = Database(_resolve_db_path(config))
+	db = Database(_resolve_db_path(config, args.shard))
 	now = date.today()
-	count = send_due_reminders(config, db, now)
+	workers = max(1, int(args.workers))
+	sharded = _open_sharded(config, args.shard)
+	if sharded is not None:
+		count = send_due_reminders_sharded(config, sharded, now, workers)
+		print(f"已发送提醒: {count} 封（{len(sharded.names)} 个分片）")
+		if config.app.archive_after_days is not None:
+			moved = sum(sharded.fan_out(lambda d: d.archive_expired(config.app.archive_after_days, now)).values())
+			if moved:
+				print(f"已自动归档: {moved} 条")
+		sharded.fan_out(lambda d: d.compact_changes(config.app.change_log_keep))
+		return 0
+	# SMTP 设置只保存在默认分片（未分片时即唯一的库），--shard 指定其它分片时也从这里读取
+	smtp_conf = _resolve_smtp_config(config, Database(_resolve_db_path(config)))
+	count = send_due_reminders_parallel(config, db, now, workers, smtp_conf=smtp_conf)
 	print(f"已发送提醒: {count} 封")
+	if config.app.archive_after_days is not None:
+		moved = db.archive_expired(config.app.archive_after_days, now)
+		if moved:
+			print(f"已自动归档: {moved} 条")
+	db.compact_changes(config.app.change_log_keep)
 	return 0
 
 
 def cmd_send_test(args: argparse.Namespace) -> int:
 	config = load_config(_resolve_config_path(args.config))
+	# 页面保存的 SMTP 设置位于默认分片
 	db = Database(_resolve_db_path(config))
 	to_email = args.to
 	subject = args.subject or "CertMon 测试邮件"
@@ -124,14 +197,272 @@ def cmd_send_test(args: argparse.Namespace) -> int:
 	else:
 		smtp_conf = config.smtp
 	try:
-		send_email(smtp_conf, to_email, subject, body)
-		print("测试邮件发送成功")
+		make_transport(config.mail, smtp_conf).send_batch([build_message(smtp_conf.from_email, to_email, subject, body)])
+		print(f"测试邮件发送成功（{config.mail.transport}）")
 		return 0
 	except Exception as e:
 		print(f"测试邮件发送失败: {e}")
 		return 2
 
 
+def cmd_scan_dir(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	db = Database(_resolve_db_path(config, args.shard))
+	db.initialize_schema()
+	root = Path(args.path)
+	if not root.is_dir():
+		print(f"目录不存在: {root.as_posix()}")
+		return 1
+	result = scan_directory(db, root.as_posix(), args.email, workers=args.workers)
+	print(
+		f"扫描完成：文件 {result.files_seen} 个，未变化跳过 {result.files_skipped} 个，"
+		f"新增 {result.inserted} 条，更新 {result.updated} 条，失败 {len(result.errors)} 个"
+	)
+	for path, error in result.errors[:20]:
+		print(f"  解析失败: {path}: {error}")
+	return 0
+
+
+def cmd_endpoint_add(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	db = Database(_resolve_db_path(config, args.shard))
+	db.initialize_schema()
+	cert_id = int(args.cert_id) if args.cert_id is not None else None
+	if cert_id is None:
+		# 未指定关联证书时新建一条占位记录（远期到期日，避免探测前误发提醒），到期日由首次探测写入
+		placeholder = date(9999, 12, 31)
+		cert_id = db.add_certificate(args.sni or f"{args.host}:{args.port}", args.email, placeholder, 0, placeholder, f"探测: {args.host}:{args.port}")
+	new_id = db.add_endpoint(args.host, int(args.port), args.sni, cert_id)
+	print(f"已添加探测目标，id={new_id}，关联证书 id={cert_id}")
+	return 0
+
+
+def cmd_endpoint_list(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	db = Database(_resolve_db_path(config, args.shard))
+	db.initialize_schema()
+	endpoints = db.list_endpoints()
+	if not endpoints:
+		print("暂无记录")
+		return 0
+	print("id\thost:port\tsni\tcert_id\tlast_expires_on\tlast_probed_at\tlast_error")
+	for ep in endpoints:
+		expires = ep.last_expires_on.strftime("%Y-%m-%d") if ep.last_expires_on else "-"
+		probed = ep.last_probed_at.strftime("%Y-%m-%d %H:%M:%S") if ep.last_probed_at else "-"
+		print(f"{ep.id}\t{ep.host}:{ep.port}\t{ep.server_name or '-'}\t{ep.certificate_id or '-'}\t{expires}\t{probed}\t{ep.last_error or '-'}")
+	return 0
+
+
+def cmd_endpoint_remove(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	db = Database(_resolve_db_path(config, args.shard))
+	if db.remove_endpoint(int(args.id)):
+		print("已删除")
+		return 0
+	print("未找到指定 id")
+	return 1
+
+
+def cmd_probe(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	db = Database(_resolve_db_path(config, args.shard))
+	db.initialize_schema()
+	summary = probe_all(
+		db,
+		concurrency=args.concurrency,
+		per_host_limit=args.per_host,
+		timeout=args.timeout,
+	)
+	print(f"探测完成：目标 {summary.probed} 个，失败 {summary.failed} 个，更新到期日 {summary.certificates_updated} 条")
+	return 0 if summary.failed == 0 else 3
+
+
+VACUUM_CONVERT_HINT = "数据库未启用增量 auto_vacuum，请先执行 vacuum --convert（完整 VACUUM，会重写整个数据库文件并在期间锁库）"
+
+
+def cmd_archive(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	db = Database(_resolve_db_path(config, args.shard))
+	db.initialize_schema()
+	moved = db.archive_expired(args.older_than, date.today(), chunk_size=args.chunk_size)
+	print(f"已归档: {moved} 条")
+	if args.vacuum:
+		if db.auto_vacuum_mode() != 2:
+			print(f"未回收空间：{VACUUM_CONVERT_HINT}")
+			return 0
+		before, after = db.incremental_vacuum()
+		print(f"空间回收：空闲页 {before} -> {after}")
+	return 0
+
+
+def _archive_row(r: ArchivedCertificate) -> list:
+	return [
+		r.id,
+		r.name,
+		r.email,
+		r.acquired_on.strftime("%Y-%m-%d"),
+		r.valid_months,
+		r.expires_on.strftime("%Y-%m-%d"),
+		r.notes or "",
+		r.last_reminded_on.strftime("%Y-%m-%d") if r.last_reminded_on else "",
+		r.archived_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+	]
+
+
+def _archive_rows(db: Database):
+	for r in db.list_archived_certificates():
+		yield _archive_row(r)
+
+
+ARCHIVE_COLUMNS = ["id", "name", "email", "acquired_on", "valid_months", "expires_on", "notes", "last_reminded_on", "archived_at"]
+
+
+def cmd_archive_list(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	db = Database(_resolve_db_path(config, args.shard))
+	db.initialize_schema()
+	rows = list(_archive_rows(db))
+	if not rows:
+		print("暂无记录")
+		return 0
+	print("\t".join(ARCHIVE_COLUMNS))
+	for row in rows:
+		print("\t".join(str(v) if v != "" else "-" for v in row))
+	return 0
+
+
+def cmd_archive_export(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	db = Database(_resolve_db_path(config, args.shard))
+	db.initialize_schema()
+	out = Path(args.output)
+	count = 0
+	sharded = _open_sharded(config, args.shard)
+	with out.open("w", encoding="utf-8", newline="") as f:
+		writer = csv.writer(f)
+		if sharded is not None:
+			writer.writerow(["shard"] + ARCHIVE_COLUMNS)
+			for shard_name, r in sharded.list_archived_certificates():
+				writer.writerow([shard_name] + _archive_row(r))
+				count += 1
+		else:
+			writer.writerow(ARCHIVE_COLUMNS)
+			for row in _archive_rows(db):
+				writer.writerow(row)
+				count += 1
+	print(f"已导出 {count} 条归档记录: {out.as_posix()}")
+	return 0
+
+
+def cmd_vacuum(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	db = Database(_resolve_db_path(config, args.shard))
+	if args.convert:
+		before, after = db.convert_to_incremental_vacuum()
+		print(f"已转换为增量 auto_vacuum：空闲页 {before} -> {after}")
+		return 0
+	if db.auto_vacuum_mode() != 2:
+		print(VACUUM_CONVERT_HINT)
+		return 1
+	before, after = db.incremental_vacuum(args.pages)
+	print(f"空间回收：空闲页 {before} -> {after}")
+	return 0
+
+
+def cmd_compact_changes(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	db = Database(_resolve_db_path(config, args.shard))
+	db.initialize_schema()
+	keep = args.keep if args.keep is not None else (config.app.change_log_keep if config else 10000)
+	removed = db.compact_changes(keep)
+	print(f"已压缩变更日志: 删除 {removed} 条，保留最近 {keep} 条")
+	return 0
+
+
+def cmd_recompute_expiry(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	db = Database(_resolve_db_path(config, args.shard))
+	db.initialize_schema()
+	started = time.monotonic()
+	try:
+		result = recompute_expiry(db, where=args.where, dry_run=args.dry_run, chunk_size=args.chunk_size, sample_limit=args.show)
+	except sqlite3.OperationalError as e:
+		print(f"查询失败（请检查 --where 条件）: {e}")
+		return 1
+	elapsed = time.monotonic() - started
+	for cid, old, new in result.samples:
+		print(f"  id={cid}: {old} -> {new}")
+	if result.changed > len(result.samples):
+		print(f"  ... 另有 {result.changed - len(result.samples)} 条")
+	action = "将更新" if args.dry_run else "已更新"
+	print(f"扫描 {result.scanned} 条，{action} {result.changed} 条，用时 {elapsed:.1f} 秒")
+	return 0
+
+
+def cmd_forecast(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	if config is None:
+		print("未找到配置文件，无法读取 reminder_window_days")
+		return 1
+	sharded = _open_sharded(config, args.shard)
+	db = sharded if sharded is not None else Database(_resolve_db_path(config, args.shard))
+	db.initialize_schema()
+	fc = build_forecast(config, db, date.today(), max(1, int(args.days)), mode=args.mode, top=args.top)
+	quota_label = str(fc.quota) if fc.quota is not None else "-"
+	print(f"提醒量预测：{fc.days} 天，模式 {fc.mode}，每日配额 {quota_label}")
+	print("date\temails\tdigest_emails\tover_quota")
+	for d in fc.daily:
+		print(f"{d.day.strftime('%Y-%m-%d')}\t{d.emails}\t{d.digest_emails}\t{'!' if d.over_quota else ''}")
+	peak = fc.peak
+	if peak is not None:
+		print(f"峰值: {peak.day.strftime('%Y-%m-%d')} {fc.count(peak)} 封，合计 {sum(fc.count(d) for d in fc.daily)} 封")
+	over = [d for d in fc.daily if d.over_quota]
+	if over:
+		print(f"超出配额的天数: {len(over)}")
+	if fc.recipients:
+		print("recipient\temails\tdigest_emails")
+		for r in fc.recipients:
+			print(f"{r.email}\t{r.emails}\t{r.digest_emails}")
+	return 0
+
+
+def cmd_backup(args: argparse.Namespace) -> int:
+	config = try_load_config(_resolve_config_path(args.config))
+	if config is not None and config.app.shards and args.shard is None:
+		targets = [(f"certmon-{name}", _resolve_db_path(config, name)) for name in config.app.shards]
+	else:
+		name = f"certmon-{args.shard}" if args.shard else "certmon"
+		targets = [(name, _resolve_db_path(config, args.shard))]
+	status = 0
+	for name, source in targets:
+		if not Path(source).exists():
+			print(f"数据库不存在: {source}")
+			status = 1
+			continue
+		try:
+			result = backup_database(
+				source,
+				args.dest,
+				name=name,
+				pages_per_step=args.pages,
+				sleep_seconds=args.sleep,
+				compress=args.compress,
+				verify=not args.no_verify,
+				keep=args.keep,
+			)
+		except (BackupError, sqlite3.Error, OSError) as e:
+			print(f"备份失败: {source}: {e}")
+			status = 2
+			continue
+		print(
+			f"已备份: {result.path}（{result.pages} 页，{result.size_bytes} 字节，"
+			f"用时 {result.elapsed:.2f} 秒，{result.pages_per_second:.0f} 页/秒，完整性 {result.integrity}）"
+		)
+		for path in result.removed:
+			print(f"  已轮转删除: {path}")
+	return status
+
+
 def build_parser() -> argparse.ArgumentParser:
 	parser = argparse.ArgumentParser(
 		prog="certmon",
@@ -149,6 +480,12 @@ def build_parser() -> argparse.ArgumentParser:
 		help="配置文件路径 (默认: /etc/certmon/config.json)",
 		default="/etc/certmon/config.json",
 	)
+	parser.add_argument(
+		"-s",
+		"--shard",
+		help="分片名（配置了 app.shards 时；列表/提醒/导出默认扇出到全部分片，其它命令默认使用 default_shard）",
+		default=None,
+	)
 	sp = parser.add_subparsers(dest="cmd", required=True)
 
 	sp_init = sp.add_parser("init-db", help="初始化数据库")
@@ -171,7 +508,80 @@ def build_parser() -> argparse.ArgumentParser:
 	sp_rm.add_argument("--id", required=True, help="证书 id")
 	sp_rm.set_defaults(func=cmd_remove)
 
+	sp_scan = sp.add_parser("scan-dir", help="扫描目录中的 PEM/DER 证书文件并导入")
+	sp_scan.add_argument("path", help="证书目录（递归扫描）")
+	sp_scan.add_argument("--email", required=True, help="新导入证书的提醒邮箱")
+	sp_scan.add_argument("--workers", type=int, default=None, help="解析进程数（默认 CPU 核数）")
+	sp_scan.set_defaults(func=cmd_scan_dir)
+
+	sp_ep_add = sp.add_parser("endpoint-add", help="添加 TLS 探测目标")
+	sp_ep_add.add_argument("--host", required=True, help="主机名或 IP")
+	sp_ep_add.add_argument("--port", type=int, default=443, help="端口（默认 443）")
+	sp_ep_add.add_argument("--sni", required=False, default=None, help="SNI 主机名（默认同 --host）")
+	ep_group = sp_ep_add.add_mutually_exclusive_group(required=True)
+	ep_group.add_argument("--cert-id", help="关联已有证书 id")
+	ep_group.add_argument("--email", help="新建关联证书记录并使用该提醒邮箱")
+	sp_ep_add.set_defaults(func=cmd_endpoint_add)
+
+	sp_ep_list = sp.add_parser("endpoint-list", help="列出 TLS 探测目标")
+	sp_ep_list.set_defaults(func=cmd_endpoint_list)
+
+	sp_ep_rm = sp.add_parser("endpoint-remove", help="按 id 删除 TLS 探测目标")
+	sp_ep_rm.add_argument("--id", required=True, help="探测目标 id")
+	sp_ep_rm.set_defaults(func=cmd_endpoint_remove)
+
+	sp_probe = sp.add_parser("probe", help="握手所有 TLS 探测目标并更新证书到期日")
+	sp_probe.add_argument("--concurrency", type=int, default=100, help="最大并发连接数（默认 100）")
+	sp_probe.add_argument("--per-host", type=int, default=4, help="同一主机最大并发连接数（默认 4）")
+	sp_probe.add_argument("--timeout", type=float, default=10.0, help="单个目标超时秒数（默认 10）")
+	sp_probe.set_defaults(func=cmd_probe)
+
+	sp_arc = sp.add_parser("archive", help="将到期已久的证书移入归档表")
+	sp_arc.add_argument("--older-than", type=_non_negative_int, required=True, help="到期超过的天数")
+	sp_arc.add_argument("--chunk-size", type=int, default=1000, help="每个事务迁移的条数（默认 1000）")
+	sp_arc.add_argument("--vacuum", action="store_true", help="归档后回收数据库文件空间")
+	sp_arc.set_defaults(func=cmd_archive)
+
+	sp_arc_list = sp.add_parser("archive-list", help="列出归档证书（只读）")
+	sp_arc_list.set_defaults(func=cmd_archive_list)
+
+	sp_arc_exp = sp.add_parser("archive-export", help="导出归档证书为 CSV")
+	sp_arc_exp.add_argument("--output", required=True, help="输出 CSV 文件路径")
+	sp_arc_exp.set_defaults(func=cmd_archive_export)
+
+	sp_vac = sp.add_parser("vacuum", help="增量回收数据库文件空间")
+	sp_vac.add_argument("--pages", type=int, default=None, help="最多回收的页数（默认全部）")
+	sp_vac.add_argument("--convert", action="store_true", help="将旧库转换为增量 auto_vacuum（完整 VACUUM，一次性操作）")
+	sp_vac.set_defaults(func=cmd_vacuum)
+
+	sp_cc = sp.add_parser("compact-changes", help="压缩变更日志（按 seq 保留最近 N 条）")
+	sp_cc.add_argument("--keep", type=int, default=None, help="保留条数（默认 app.change_log_keep）")
+	sp_cc.set_defaults(func=cmd_compact_changes)
+
+	sp_rc = sp.add_parser("recompute-expiry", help="按 获取日期 + 有效月数 批量重算到期日")
+	sp_rc.add_argument("--where", required=False, default=None, help="附加 SQL 条件，如 \"acquired_on >= '2024-01-01'\"")
+	sp_rc.add_argument("--dry-run", action="store_true", help="只显示差异，不写回")
+	sp_rc.add_argument("--chunk-size", type=int, default=5000, help="每块读取/写回的条数（默认 5000）")
+	sp_rc.add_argument("--show", type=int, default=20, help="显示的差异条数（默认 20）")
+	sp_rc.set_defaults(func=cmd_recompute_expiry)
+
+	sp_fc = sp.add_parser("forecast", help="预测未来每天的提醒邮件量")
+	sp_fc.add_argument("--days", type=int, default=90, help="预测天数（默认 90）")
+	sp_fc.add_argument("--mode", choices=FORECAST_MODES, default="certificate", help="certificate：每证书一封；digest：每收件人每天一封")
+	sp_fc.add_argument("--top", type=int, default=10, help="显示邮件量最多的收件人数（默认 10）")
+	sp_fc.set_defaults(func=cmd_forecast)
+
+	sp_bak = sp.add_parser("backup", help="在线备份数据库（不阻塞 Web 与提醒任务）")
+	sp_bak.add_argument("dest", help="备份目录")
+	sp_bak.add_argument("--pages", type=int, default=256, help="每步复制的页数（默认 256）")
+	sp_bak.add_argument("--sleep", type=float, default=0.05, help="每步之间休眠秒数（默认 0.05）")
+	sp_bak.add_argument("--compress", action="store_true", help="gzip 压缩备份文件")
+	sp_bak.add_argument("--no-verify", action="store_true", help="跳过备份文件的 integrity_check")
+	sp_bak.add_argument("--keep", type=int, default=None, help="只保留最近 N 份备份")
+	sp_bak.set_defaults(func=cmd_backup)
+
 	sp_send = sp.add_parser("send-reminders", help="发送到期提醒")
+	sp_send.add_argument("--workers", type=int, default=1, help="并行发送者数量（默认 1；多主机可同时运行）")
 	sp_send.set_defaults(func=cmd_send_reminders)
 
 	sp_test = sp.add_parser("send-test", help="发送测试邮件以验证 SMTP 配置")
@@ -189,7 +599,11 @@ def main(argv: list[str] | None = None) -> int:
 	args = parser.parse_args(argv)
 	if args.chdir:
 		os.chdir(args.chdir)
-	return args.func(args)
+	try:
+		return args.func(args)
+	except argparse.ArgumentTypeError as e:
+		# 依赖配置的参数（如 --shard）只能在命令执行时校验，按参数错误输出用法并退出
+		parser.error(str(e))
 
 
 if __name__ == "__main__":
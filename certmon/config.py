@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 
 @dataclass
@@ -20,12 +22,35 @@ class SMTPConfig:
 class AppConfig:
 	database_path: str = "data/certmon.db"
 	reminder_window_days: int = 7
+	# 自动归档：send-reminders 后将到期超过该天数的记录移入归档表；None 表示关闭
+	archive_after_days: Optional[int] = None
+	# Web 读取走每个 worker 的内存快照（数据变化时自动刷新）
+	read_snapshot: bool = False
+	# 多进程发送提醒：每次认领的证书数与租约时长（秒）
+	reminder_batch_size: int = 50
+	reminder_lease_seconds: int = 300
+	# 邮件服务商每日发送配额，forecast 用于标记超额日期；None 表示不检查
+	daily_send_quota: Optional[int] = None
+	# 变更日志保留条数（send-reminders 后按 seq 压缩）
+	change_log_keep: int = 10000
+	# 分片：分片名 -> 数据库文件路径；为空时使用 database_path 单库
+	shards: Dict[str, str] = field(default_factory=dict)
+	default_shard: Optional[str] = None
+
+
+@dataclass
+class MailConfig:
+	# smtp：直连 SMTP；sendmail：交给本机 MTA；spool：写入 maildir 目录由中继投递
+	transport: str = "smtp"
+	sendmail_path: str = "/usr/sbin/sendmail"
+	spool_dir: str = "data/spool"
 
 
 @dataclass
 class Config:
 	smtp: SMTPConfig
 	app: AppConfig
+	mail: MailConfig = field(default_factory=MailConfig)
 
 
 def _load_json(path: Path) -> dict:
@@ -48,8 +73,30 @@ def load_config(config_path: str = "config.json") -> Config:
 	app = AppConfig(
 		database_path=data.get("app", {}).get("database_path", "data/certmon.db"),
 		reminder_window_days=int(data.get("app", {}).get("reminder_window_days", 7)),
+		archive_after_days=(
+			int(data["app"]["archive_after_days"])
+			if data.get("app", {}).get("archive_after_days") is not None
+			else None
+		),
+		read_snapshot=bool(data.get("app", {}).get("read_snapshot", False)),
+		reminder_batch_size=int(data.get("app", {}).get("reminder_batch_size", 50)),
+		reminder_lease_seconds=int(data.get("app", {}).get("reminder_lease_seconds", 300)),
+		daily_send_quota=(
+			int(data["app"]["daily_send_quota"])
+			if data.get("app", {}).get("daily_send_quota") is not None
+			else None
+		),
+		change_log_keep=int(data.get("app", {}).get("change_log_keep", 10000)),
+		shards={str(k): str(v) for k, v in (data.get("app", {}).get("shards") or {}).items()},
+		default_shard=data.get("app", {}).get("default_shard"),
 	)
-	return Config(smtp=smtp, app=app)
+	mail_data = data.get("mail", {})
+	mail = MailConfig(
+		transport=str(mail_data.get("transport", "smtp")),
+		sendmail_path=str(mail_data.get("sendmail_path", "/usr/sbin/sendmail")),
+		spool_dir=str(mail_data.get("spool_dir", "data/spool")),
+	)
+	return Config(smtp=smtp, app=app, mail=mail)
 
 
 def try_load_config(config_path: str = "config.json") -> Optional[Config]:
@@ -58,3 +105,59 @@ def try_load_config(config_path: str = "config.json") -> Optional[Config]:
 		return None
 	return load_config(config_path)
 
+
+
+class ConfigHolder:
+	# 可热加载的配置：按 mtime 检查（最多每 check_interval 秒 stat 一次）或收到 SIGHUP 后重新读取。
+	# 读取失败时保留旧配置；version 每次成功加载递增，调用方据此重建依赖组件
+	def __init__(self, config_path: str, check_interval: float = 2.0) -> None:
+		self._path = Path(config_path)
+		self._check_interval = check_interval
+		self._lock = threading.Lock()
+		self._next_check = 0.0
+		self._mtime: Optional[float] = None
+		self._force = False
+		self.config: Optional[Config] = None
+		self.version = 0
+		self.loaded_at = 0.0
+		self.reload_errors = 0
+		self.last_error: Optional[str] = None
+		self.reload()
+
+	def _stat_mtime(self) -> Optional[float]:
+		try:
+			return self._path.stat().st_mtime
+		except OSError:
+			return None
+
+	def reload(self) -> bool:
+		with self._lock:
+			mtime = self._stat_mtime()
+			try:
+				config = load_config(self._path.as_posix()) if mtime is not None else None
+			except (OSError, ValueError, KeyError, TypeError) as e:
+				self.reload_errors += 1
+				self.last_error = str(e)
+				self._mtime = mtime
+				return False
+			# 整体替换引用，读取方拿到的始终是完整的一份 Config
+			self.config = config
+			self._mtime = mtime
+			self.version += 1
+			self.loaded_at = time.time()
+			self.last_error = None
+			self._force = False
+			return True
+
+	def request_reload(self) -> None:
+		# 可在信号处理函数中调用：只置标记，实际加载在下一次 current() 中完成
+		self._force = True
+		self._next_check = 0.0
+
+	def current(self) -> Optional[Config]:
+		now = time.monotonic()
+		if now >= self._next_check:
+			self._next_check = now + self._check_interval
+			if self._force or self._stat_mtime() != self._mtime:
+				self.reload()
+		return self.config
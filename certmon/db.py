@@ -1,10 +1,52 @@
 from __future__ import annotations
 
 import sqlite3
+import time
 from dataclasses import dataclass
 from datetime import date, datetime
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, ContextManager, Dict, Iterable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+	from .snapshot import ReadSnapshot
+
+
+# 搜索最多返回的匹配数：超出时只在最新的这些记录中排序分页，计数与排序的开销不随匹配数增长
+SEARCH_RESULT_LIMIT = 1000
+
+# 中日韩字符（假名、汉字、扩展 A、兼容汉字、韩文音节）：1~2 个字的词走字/双字索引
+_CJK_RANGES = ((0x3040, 0x30FF), (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xAC00, 0xD7AF), (0xF900, 0xFAFF))
+
+# 字/双字索引只覆盖每条记录文本的前若干个字符（位置表的大小）
+_CJK_INDEX_MAX_CHARS = 8192
+
+
+def _is_cjk(text: str) -> bool:
+	return bool(text) and all(any(lo <= ord(ch) <= hi for lo, hi in _CJK_RANGES) for ch in text)
+
+
+def _cjk_char_sql(expr: str) -> str:
+	return "(" + " OR ".join(f"unicode({expr}) BETWEEN {lo} AND {hi}" for lo, hi in _CJK_RANGES) + ")"
+
+
+# 不含中日韩字符的记录（大多数域名证书）直接跳过逐字扫描
+_CJK_GLOB = "*[" + "".join(f"{chr(lo)}-{chr(hi)}" for lo, hi in _CJK_RANGES) + "]*"
+
+
+def _cjk_grams_sql(row: str) -> str:
+	# 纯 SQL 生成 row 的中日韩单字与相邻双字（空格分隔），供触发器与重建共用；
+	# 三个字段以换行拼接，双字不会跨字段
+	return f"""
+		SELECT group_concat(g, ' ') FROM (
+			SELECT DISTINCT substr(t, n, k) AS g
+			FROM (SELECT {row}.name || char(10) || {row}.email || char(10) || coalesce({row}.notes, '') AS t),
+				search_positions,
+				(SELECT 1 AS k UNION ALL SELECT 2)
+			WHERE t GLOB '{_CJK_GLOB}' AND n <= length(t) AND n + k - 1 <= length(t)
+				AND {_cjk_char_sql('substr(t, n, 1)')}
+				AND (k = 1 OR {_cjk_char_sql('substr(t, n + 1, 1)')})
+		)
+	"""
 
 
 @dataclass
@@ -21,6 +63,31 @@ class Certificate:
 	updated_at: datetime
 
 
+@dataclass
+class ArchivedCertificate(Certificate):
+	archived_at: datetime
+
+
+@dataclass
+class Endpoint:
+	id: int
+	host: str
+	port: int
+	server_name: Optional[str]
+	certificate_id: Optional[int]
+	last_probed_at: Optional[datetime]
+	last_expires_on: Optional[date]
+	last_error: Optional[str]
+
+
+@dataclass
+class Change:
+	seq: int
+	op: str
+	certificate_id: int
+	certificate: Optional[Certificate]
+
+
 @dataclass
 class SMTPSettings:
 	host: Optional[str]
@@ -43,17 +110,26 @@ class User:
 
 
 class Database:
-	def __init__(self, database_path: str) -> None:
+	def __init__(self, database_path: str, snapshot: Optional["ReadSnapshot"] = None) -> None:
 		self._path = Path(database_path)
 		self._path.parent.mkdir(parents=True, exist_ok=True)
+		self._snapshot = snapshot
 
 	def connect(self) -> sqlite3.Connection:
 		conn = sqlite3.connect(self._path.as_posix())
 		conn.row_factory = sqlite3.Row
 		return conn
 
+	def _read_connection(self) -> ContextManager[sqlite3.Connection]:
+		# 配置了内存快照时，列表/搜索等只读查询走快照，写入仍直接落盘
+		if self._snapshot is not None:
+			return self._snapshot.connection()
+		return self.connect()
+
 	def initialize_schema(self) -> None:
 		with self.connect() as conn:
+			# 新库启用增量 auto_vacuum（对已有表的库无效，需经 convert_to_incremental_vacuum() 转换）
+			conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
 			conn.execute(
 				"""
 				CREATE TABLE IF NOT EXISTS certificates (
@@ -104,6 +180,181 @@ class Database:
 				);
 				"""
 			)
+			# 证书文件扫描缓存：按 path + mtime + size 判断文件是否变化
+			conn.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS scan_cache (
+					path TEXT PRIMARY KEY,
+					mtime_ns INTEGER NOT NULL,
+					size INTEGER NOT NULL,
+					certificate_id INTEGER,
+					fingerprint TEXT,
+					scanned_at TEXT NOT NULL
+				);
+				"""
+			)
+			conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_cache_fingerprint ON scan_cache(fingerprint)")
+
+			# TLS 探测目标：host:port + SNI，关联到 certificates 中的一条记录
+			conn.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS endpoints (
+					id INTEGER PRIMARY KEY AUTOINCREMENT,
+					host TEXT NOT NULL,
+					port INTEGER NOT NULL,
+					server_name TEXT,
+					certificate_id INTEGER,
+					last_probed_at TEXT,
+					last_expires_on TEXT,
+					last_error TEXT,
+					UNIQUE (host, port, server_name)
+				);
+				"""
+			)
+
+			# 归档表：与 certificates 同结构，保留原 id
+			conn.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS certificates_archive (
+					id INTEGER PRIMARY KEY,
+					name TEXT NOT NULL,
+					email TEXT NOT NULL,
+					acquired_on TEXT NOT NULL,
+					valid_months INTEGER NOT NULL,
+					expires_on TEXT NOT NULL,
+					notes TEXT,
+					last_reminded_on TEXT,
+					created_at TEXT NOT NULL,
+					updated_at TEXT NOT NULL,
+					archived_at TEXT NOT NULL
+				);
+				"""
+			)
+			# 提醒租约：多个 send-reminders 进程按块认领待发送证书，租约过期后可被他人接管
+			conn.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS reminder_leases (
+					certificate_id INTEGER PRIMARY KEY,
+					remind_on TEXT NOT NULL,
+					owner TEXT NOT NULL,
+					expires_at REAL NOT NULL
+				);
+				"""
+			)
+			# 变更日志：由触发器写入，覆盖 CLI、Web、扫描、探测、归档等所有写入路径
+			conn.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS changes (
+					seq INTEGER PRIMARY KEY AUTOINCREMENT,
+					op TEXT NOT NULL,
+					certificate_id INTEGER NOT NULL,
+					changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+				);
+				"""
+			)
+			conn.execute(
+				"""
+				CREATE TRIGGER IF NOT EXISTS certificates_changes_ai AFTER INSERT ON certificates BEGIN
+					INSERT INTO changes (op, certificate_id) VALUES ('upsert', new.id);
+				END;
+				"""
+			)
+			conn.execute(
+				"""
+				CREATE TRIGGER IF NOT EXISTS certificates_changes_au AFTER UPDATE ON certificates BEGIN
+					INSERT INTO changes (op, certificate_id) VALUES ('upsert', new.id);
+				END;
+				"""
+			)
+			conn.execute(
+				"""
+				CREATE TRIGGER IF NOT EXISTS certificates_changes_ad AFTER DELETE ON certificates BEGIN
+					INSERT INTO changes (op, certificate_id) VALUES ('delete', old.id);
+				END;
+				"""
+			)
+		self._ensure_search_index()
+
+	def _ensure_search_index(self) -> None:
+		# 两个 FTS5 索引（均由触发器同步）：
+		#   certificates_fts：trigram 分词，按子串匹配 3 个字符及以上的词，中文不分词也能命中；
+		#   certificates_cjk：中日韩单字与双字，覆盖 1~2 个字的中文词（如“证书”“网关”）。
+		# SQLite 未编译 FTS5 或早于 3.34 不支持 trigram 时（如 CentOS 7 自带 3.7.x）回退到 LIKE 查询
+		with self.connect() as conn:
+			exists = conn.execute(
+				"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'certificates_fts'"
+			).fetchone()
+			if exists:
+				return
+			try:
+				conn.execute(
+					"""
+					CREATE VIRTUAL TABLE certificates_fts USING fts5(
+						name, email, notes,
+						content='certificates', content_rowid='id',
+						tokenize='trigram'
+					);
+					"""
+				)
+			except sqlite3.OperationalError:
+				return
+			conn.execute(
+				"""
+				CREATE TRIGGER IF NOT EXISTS certificates_fts_ai AFTER INSERT ON certificates BEGIN
+					INSERT INTO certificates_fts (rowid, name, email, notes) VALUES (new.id, new.name, new.email, new.notes);
+				END;
+				"""
+			)
+			conn.execute(
+				"""
+				CREATE TRIGGER IF NOT EXISTS certificates_fts_ad AFTER DELETE ON certificates BEGIN
+					INSERT INTO certificates_fts (certificates_fts, rowid, name, email, notes) VALUES ('delete', old.id, old.name, old.email, old.notes);
+				END;
+				"""
+			)
+			conn.execute(
+				"""
+				CREATE TRIGGER IF NOT EXISTS certificates_fts_au AFTER UPDATE OF name, email, notes ON certificates BEGIN
+					INSERT INTO certificates_fts (certificates_fts, rowid, name, email, notes) VALUES ('delete', old.id, old.name, old.email, old.notes);
+					INSERT INTO certificates_fts (rowid, name, email, notes) VALUES (new.id, new.name, new.email, new.notes);
+				END;
+				"""
+			)
+			conn.execute("INSERT INTO certificates_fts (certificates_fts) VALUES ('rebuild')")
+
+			# 触发器内不能使用 WITH，借助位置表逐字取出中日韩字符
+			conn.execute("CREATE TABLE IF NOT EXISTS search_positions (n INTEGER PRIMARY KEY)")
+			conn.execute(
+				"""
+				WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+				INSERT OR IGNORE INTO search_positions (n) SELECT n FROM seq
+				""",
+				(_CJK_INDEX_MAX_CHARS,),
+			)
+			conn.execute("CREATE VIRTUAL TABLE certificates_cjk USING fts5(grams, tokenize='unicode61')")
+			conn.execute(
+				f"""
+				CREATE TRIGGER IF NOT EXISTS certificates_cjk_ai AFTER INSERT ON certificates BEGIN
+					INSERT INTO certificates_cjk (rowid, grams) VALUES (new.id, ({_cjk_grams_sql('new')}));
+				END;
+				"""
+			)
+			conn.execute(
+				"""
+				CREATE TRIGGER IF NOT EXISTS certificates_cjk_ad AFTER DELETE ON certificates BEGIN
+					DELETE FROM certificates_cjk WHERE rowid = old.id;
+				END;
+				"""
+			)
+			conn.execute(
+				f"""
+				CREATE TRIGGER IF NOT EXISTS certificates_cjk_au AFTER UPDATE OF name, email, notes ON certificates BEGIN
+					DELETE FROM certificates_cjk WHERE rowid = old.id;
+					INSERT INTO certificates_cjk (rowid, grams) VALUES (new.id, ({_cjk_grams_sql('new')}));
+				END;
+				"""
+			)
+			conn.execute(f"INSERT INTO certificates_cjk (rowid, grams) SELECT c.id, ({_cjk_grams_sql('c')}) FROM certificates c")
 
 	@staticmethod
 	def _today_string(d: Optional[date] = None) -> str:
@@ -152,7 +403,7 @@ class Database:
 			return int(cursor.lastrowid)
 
 	def list_certificates(self) -> List[Certificate]:
-		with self.connect() as conn:
+		with self._read_connection() as conn:
 			# 确保表存在
 			conn.execute(
 				"""
@@ -379,3 +630,676 @@ class Database:
 					),
 				)
 
+
+	def get_scan_cache(self) -> Dict[str, Tuple[int, int]]:
+		with self.connect() as conn:
+			rows = conn.execute("SELECT path, mtime_ns, size FROM scan_cache").fetchall()
+			return {str(r["path"]): (int(r["mtime_ns"]), int(r["size"])) for r in rows}
+
+	def upsert_scanned_certificates(
+		self,
+		entries: Iterable[Tuple[str, int, int, str, str, date, date]],
+		email: str,
+	) -> Tuple[int, int]:
+		# entries: (path, mtime_ns, size, fingerprint, name, acquired_on, expires_on)；单事务批量写入。
+		# 以 DER 的 SHA-256 识别证书：同一证书出现在多个文件（证书链、.pem/.der 副本、符号链接）时只保留一条记录
+		inserted = 0
+		updated = 0
+		now = self._now_string()
+		with self.connect() as conn:
+			linked: Dict[str, int] = {}
+			refs: Dict[int, int] = {}
+			by_fingerprint: Dict[str, int] = {}
+			fingerprint_of: Dict[int, str] = {}
+			for r in conn.execute(
+				"""
+				SELECT s.path, s.certificate_id, s.fingerprint FROM scan_cache s
+				JOIN certificates c ON c.id = s.certificate_id
+				"""
+			).fetchall():
+				cid = int(r["certificate_id"])
+				linked[str(r["path"])] = cid
+				refs[cid] = refs.get(cid, 0) + 1
+				if r["fingerprint"]:
+					by_fingerprint[str(r["fingerprint"])] = cid
+					fingerprint_of[cid] = str(r["fingerprint"])
+			cache_rows = []
+			for path, mtime_ns, size, fingerprint, name, acquired_on, expires_on in entries:
+				previous = linked.get(path)
+				cid = by_fingerprint.get(fingerprint)
+				if cid is None and previous is not None and refs.get(previous) == 1:
+					# 文件换成了新证书（如续期），原记录只被这个文件引用：原地更新
+					cid = previous
+					conn.execute(
+						"UPDATE certificates SET name = ?, acquired_on = ?, expires_on = ?, updated_at = ? WHERE id = ?",
+						(name, acquired_on.strftime("%Y-%m-%d"), expires_on.strftime("%Y-%m-%d"), now, cid),
+					)
+					by_fingerprint.pop(fingerprint_of.get(cid, ""), None)
+					updated += 1
+				elif cid is None:
+					cursor = conn.execute(
+						"""
+						INSERT INTO certificates (name, email, acquired_on, valid_months, expires_on, notes, last_reminded_on, created_at, updated_at)
+						VALUES (?, ?, ?, 0, ?, ?, NULL, ?, ?)
+						""",
+						(
+							name,
+							email,
+							acquired_on.strftime("%Y-%m-%d"),
+							expires_on.strftime("%Y-%m-%d"),
+							f"文件: {path}",
+							now,
+							now,
+						),
+					)
+					cid = int(cursor.lastrowid)
+					inserted += 1
+				by_fingerprint[fingerprint] = cid
+				fingerprint_of[cid] = fingerprint
+				if previous != cid:
+					if previous is not None:
+						refs[previous] -= 1
+					refs[cid] = refs.get(cid, 0) + 1
+					linked[path] = cid
+				cache_rows.append((path, int(mtime_ns), int(size), cid, fingerprint, now))
+			if cache_rows:
+				conn.executemany(
+					"INSERT OR REPLACE INTO scan_cache (path, mtime_ns, size, certificate_id, fingerprint, scanned_at) VALUES (?, ?, ?, ?, ?, ?)",
+					cache_rows,
+				)
+		return inserted, updated
+
+	def mark_scan_failures(self, entries: Iterable[Tuple[str, int, int]]) -> None:
+		# 无法解析的文件同样写入缓存，文件不变时不再重复解析；保留原有的证书关联与指纹，
+		# 文件暂时损坏不会让已关联的记录变成孤儿，修复后重新扫描仍指向同一条记录
+		now = self._now_string()
+		with self.connect() as conn:
+			conn.executemany(
+				"""
+				INSERT OR REPLACE INTO scan_cache (path, mtime_ns, size, certificate_id, fingerprint, scanned_at)
+				VALUES (?, ?, ?, (SELECT certificate_id FROM scan_cache WHERE path = ?), (SELECT fingerprint FROM scan_cache WHERE path = ?), ?)
+				""",
+				[(path, int(mtime_ns), int(size), path, path, now) for path, mtime_ns, size in entries],
+			)
+
+	def add_endpoint(self, host: str, port: int, server_name: Optional[str], certificate_id: Optional[int]) -> int:
+		with self.connect() as conn:
+			cursor = conn.execute(
+				"INSERT INTO endpoints (host, port, server_name, certificate_id) VALUES (?, ?, ?, ?)",
+				(host, int(port), server_name, certificate_id),
+			)
+			return int(cursor.lastrowid)
+
+	def list_endpoints(self) -> List[Endpoint]:
+		with self.connect() as conn:
+			rows = conn.execute(
+				"SELECT id, host, port, server_name, certificate_id, last_probed_at, last_expires_on, last_error FROM endpoints ORDER BY id ASC"
+			).fetchall()
+			return [
+				Endpoint(
+					id=int(r["id"]),
+					host=str(r["host"]),
+					port=int(r["port"]),
+					server_name=(str(r["server_name"]) if r["server_name"] is not None else None),
+					certificate_id=(int(r["certificate_id"]) if r["certificate_id"] is not None else None),
+					last_probed_at=(
+						datetime.strptime(str(r["last_probed_at"]), "%Y-%m-%dT%H:%M:%SZ")
+						if r["last_probed_at"]
+						else None
+					),
+					last_expires_on=(
+						datetime.strptime(str(r["last_expires_on"]), "%Y-%m-%d").date()
+						if r["last_expires_on"]
+						else None
+					),
+					last_error=(str(r["last_error"]) if r["last_error"] is not None else None),
+				)
+				for r in rows
+			]
+
+	def remove_endpoint(self, endpoint_id: int) -> bool:
+		with self.connect() as conn:
+			cursor = conn.execute("DELETE FROM endpoints WHERE id = ?", (endpoint_id,))
+			return cursor.rowcount > 0
+
+	def record_probe_results(self, results: Iterable[Tuple[int, Optional[int], Optional[date], Optional[date], Optional[str]]]) -> int:
+		# results: (endpoint_id, certificate_id, not_before, not_after, error)；单事务批量写入，返回更新的证书数
+		now = self._now_string()
+		endpoint_rows = []
+		cert_rows = []
+		for endpoint_id, certificate_id, not_before, not_after, error in results:
+			expires = not_after.strftime("%Y-%m-%d") if not_after else None
+			endpoint_rows.append((now, expires, error, endpoint_id))
+			if certificate_id is not None and not_before is not None and not_after is not None:
+				# 到期日来自实际证书，valid_months 置 0（与 --expires 模式一致）
+				cert_rows.append((not_before.strftime("%Y-%m-%d"), expires, now, certificate_id, expires))
+		with self.connect() as conn:
+			conn.executemany(
+				"UPDATE endpoints SET last_probed_at = ?, last_expires_on = COALESCE(?, last_expires_on), last_error = ? WHERE id = ?",
+				endpoint_rows,
+			)
+			updated = 0
+			if cert_rows:
+				cursor = conn.executemany(
+					"""
+					UPDATE certificates SET acquired_on = ?, valid_months = 0, expires_on = ?, updated_at = ?
+					WHERE id = ? AND expires_on <> ?
+					""",
+					cert_rows,
+				)
+				updated = cursor.rowcount
+			return updated
+
+	@staticmethod
+	def _row_to_certificate(r: sqlite3.Row) -> Certificate:
+		return Certificate(
+			id=int(r["id"]),
+			name=str(r["name"]),
+			email=str(r["email"]),
+			acquired_on=datetime.strptime(str(r["acquired_on"]), "%Y-%m-%d").date(),
+			valid_months=int(r["valid_months"]),
+			expires_on=datetime.strptime(str(r["expires_on"]), "%Y-%m-%d").date(),
+			notes=(str(r["notes"]) if r["notes"] is not None else None),
+			last_reminded_on=(
+				datetime.strptime(str(r["last_reminded_on"]), "%Y-%m-%d").date()
+				if r["last_reminded_on"]
+				else None
+			),
+			created_at=datetime.strptime(str(r["created_at"]), "%Y-%m-%dT%H:%M:%SZ"),
+			updated_at=datetime.strptime(str(r["updated_at"]), "%Y-%m-%dT%H:%M:%SZ"),
+		)
+
+	@staticmethod
+	def _fts_query(terms: List[str]) -> str:
+		# 每个词加引号作为短语，避免用户输入被当作 FTS5 语法解析；trigram 短语即子串匹配
+		return " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+	@staticmethod
+	def _like_clause(terms: List[str]) -> Tuple[str, List[str]]:
+		# 每个词须出现在名称、邮箱或备注之一中（词与词之间为 AND）
+		clauses = []
+		params: List[str] = []
+		for t in terms:
+			like = "%" + t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+			clauses.append("(c.name LIKE ? ESCAPE '\\' OR c.email LIKE ? ESCAPE '\\' OR c.notes LIKE ? ESCAPE '\\')")
+			params.extend([like, like, like])
+		return " AND ".join(clauses), params
+
+	def search_certificates(self, text: str, limit: int = 20, offset: int = 0) -> Tuple[List[Certificate], int, bool]:
+		# 返回 (当前页, 匹配数, 是否超过 SEARCH_RESULT_LIMIT)。候选集为最新的 SEARCH_RESULT_LIMIT 条匹配，
+		# 直接按 rowid 倒序从索引中取出；排序只看关键词命中名称/邮箱的个数，不计算 bm25，耗时不随匹配总数增长
+		terms = (text or "").split()
+		if not terms:
+			return [], 0, False
+		with self._read_connection() as conn:
+			indexes = {
+				str(r["name"])
+				for r in conn.execute(
+					"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('certificates_fts', 'certificates_cjk')"
+				).fetchall()
+			}
+			# 3 个字符及以上走 trigram；没有这类词时 1~2 个中日韩字符走字/双字索引。只用一个索引驱动，
+			# 其余关键词在按 rowid 倒序取出的行上用 LIKE 过滤，比两个 MATCH 结果求交集更省
+			trigram_terms = [t for t in terms if len(t) >= 3] if "certificates_fts" in indexes else []
+			cjk_terms = [t for t in terms if len(t) < 3 and _is_cjk(t)] if "certificates_cjk" in indexes else []
+			if trigram_terms:
+				table, match_terms = "certificates_fts", trigram_terms
+			elif cjk_terms:
+				table, match_terms = "certificates_cjk", cjk_terms
+			else:
+				table, match_terms = "", []
+			where, params = self._like_clause([t for t in terms if t not in match_terms])
+			if table:
+				filters = [f"{table} MATCH ?"]
+				if where:
+					filters.append(where)
+				# ORDER BY 必须写在与 MATCH 同一层，FTS 才会直接按 rowid 倒序输出而不是先取全部匹配再排序
+				candidates_sql = f"""
+					SELECT c.id, c.name, c.email, c.expires_on FROM {table} f
+					JOIN certificates c ON c.id = f.rowid
+					WHERE {" AND ".join(filters)}
+					ORDER BY f.rowid DESC
+					LIMIT ?
+				"""
+				params = [self._fts_query(match_terms)] + params
+			else:
+				candidates_sql = f"""
+					SELECT c.id, c.name, c.email, c.expires_on FROM certificates c
+					WHERE {where}
+					ORDER BY c.id DESC
+					LIMIT ?
+				"""
+			lowered = [t.lower() for t in terms]
+			name_hits = " + ".join("(instr(lower(name), ?) > 0)" for _ in lowered)
+			email_hits = " + ".join("(instr(lower(email), ?) > 0)" for _ in lowered)
+			ranked = conn.execute(
+				f"""
+				WITH candidates AS MATERIALIZED ({candidates_sql})
+				SELECT id FROM candidates
+				ORDER BY {name_hits} DESC, {email_hits} DESC, expires_on ASC, id ASC
+				""",
+				params + [SEARCH_RESULT_LIMIT + 1] + lowered + lowered,
+			).fetchall()
+			truncated = len(ranked) > SEARCH_RESULT_LIMIT
+			if truncated:
+				# 候选按 id 倒序截取，多取的一条必然是 id 最小的那条，只用于判断是否截断
+				oldest = min(int(r["id"]) for r in ranked)
+				ranked = [r for r in ranked if int(r["id"]) != oldest]
+			page_ids = [int(r["id"]) for r in ranked[int(offset):int(offset) + int(limit)]]
+			if not page_ids:
+				return [], len(ranked), truncated
+			rows = conn.execute(
+				f"""
+				SELECT id, name, email, acquired_on, valid_months, expires_on, notes, last_reminded_on, created_at, updated_at
+				FROM certificates WHERE id IN ({", ".join("?" * len(page_ids))})
+				""",
+				page_ids,
+			).fetchall()
+			by_id = {int(r["id"]): r for r in rows}
+			return [self._row_to_certificate(by_id[cid]) for cid in page_ids if cid in by_id], len(ranked), truncated
+
+	def archive_expired(self, older_than_days: int, today: Optional[date] = None, chunk_size: int = 1000) -> int:
+		# 按块迁移：每块一个短事务，避免长时间持有写锁
+		cutoff = self._today_string(today)
+		moved = 0
+		while True:
+			with self.connect() as conn:
+				ids = [
+					int(r["id"])
+					for r in conn.execute(
+						"""
+						SELECT id FROM certificates
+						WHERE date(expires_on) < date(?, '-' || ? || ' days')
+						ORDER BY id ASC
+						LIMIT ?
+						""",
+						(cutoff, int(older_than_days), int(chunk_size)),
+					).fetchall()
+				]
+				if not ids:
+					return moved
+				placeholders = ",".join("?" * len(ids))
+				conn.execute(
+					f"""
+					INSERT OR REPLACE INTO certificates_archive (id, name, email, acquired_on, valid_months, expires_on, notes, last_reminded_on, created_at, updated_at, archived_at)
+					SELECT id, name, email, acquired_on, valid_months, expires_on, notes, last_reminded_on, created_at, updated_at, ?
+					FROM certificates WHERE id IN ({placeholders})
+					""",
+					[self._now_string()] + ids,
+				)
+				conn.execute(f"DELETE FROM certificates WHERE id IN ({placeholders})", ids)
+				moved += len(ids)
+			if len(ids) < chunk_size:
+				return moved
+
+	def list_archived_certificates(self) -> List[ArchivedCertificate]:
+		with self._read_connection() as conn:
+			rows = conn.execute(
+				"SELECT id, name, email, acquired_on, valid_months, expires_on, notes, last_reminded_on, created_at, updated_at, archived_at FROM certificates_archive ORDER BY date(expires_on) ASC, id ASC"
+			).fetchall()
+			result: List[ArchivedCertificate] = []
+			for r in rows:
+				cert = self._row_to_certificate(r)
+				result.append(
+					ArchivedCertificate(
+						**cert.__dict__,
+						archived_at=datetime.strptime(str(r["archived_at"]), "%Y-%m-%dT%H:%M:%SZ"),
+					)
+				)
+			return result
+
+	def auto_vacuum_mode(self) -> int:
+		# 0=NONE 1=FULL 2=INCREMENTAL
+		conn = sqlite3.connect(self._path.as_posix())
+		try:
+			return int(conn.execute("PRAGMA auto_vacuum").fetchone()[0])
+		finally:
+			conn.close()
+
+	def incremental_vacuum(self, max_pages: Optional[int] = None) -> Tuple[int, int]:
+		# 返回 (回收前空闲页, 回收后空闲页)；只用于 auto_vacuum=INCREMENTAL 的库，旧库需先 convert_to_incremental_vacuum()
+		conn = sqlite3.connect(self._path.as_posix(), isolation_level=None)
+		try:
+			mode = int(conn.execute("PRAGMA auto_vacuum").fetchone()[0])
+			if mode != 2:
+				raise ValueError(f"数据库未启用增量 auto_vacuum（当前模式 {mode}）")
+			before = int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+			# 每 step 一次只释放一页，execute() 不会跑完整个语句；executescript 会执行到结束
+			pages = int(max_pages) if max_pages is not None else 0
+			conn.executescript(f"PRAGMA incremental_vacuum({pages});")
+			after = int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+			return before, after
+		finally:
+			conn.close()
+
+	def convert_to_incremental_vacuum(self) -> Tuple[int, int]:
+		# 完整 VACUUM：重写整个文件并在此期间独占数据库，耗时与库大小成正比；之后才能增量回收
+		conn = sqlite3.connect(self._path.as_posix(), isolation_level=None)
+		try:
+			before = int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+			conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+			conn.execute("VACUUM")
+			after = int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+			return before, after
+		finally:
+			conn.close()
+
+	def claim_reminder_batch(self, owner: str, today: date, reminder_window_days: int, limit: int, lease_seconds: float) -> List[Certificate]:
+		# BEGIN IMMEDIATE 保证“查询未认领 + 写入租约”原子执行，多个进程不会认领同一证书
+		day = self._today_string(today)
+		now = time.time()
+		conn = sqlite3.connect(self._path.as_posix(), isolation_level=None, timeout=30)
+		conn.row_factory = sqlite3.Row
+		try:
+			conn.execute("BEGIN IMMEDIATE")
+			rows = conn.execute(
+				"""
+				SELECT c.id, c.name, c.email, c.acquired_on, c.valid_months, c.expires_on, c.notes, c.last_reminded_on, c.created_at, c.updated_at
+				FROM certificates c
+				LEFT JOIN reminder_leases l ON l.certificate_id = c.id
+				WHERE date(c.expires_on) >= date(?)
+				  AND date(c.expires_on) <= date(?, '+' || ? || ' days')
+				  AND (c.last_reminded_on IS NULL OR c.last_reminded_on <> ?)
+				  AND (l.certificate_id IS NULL OR l.expires_at <= ? OR l.remind_on <> ?)
+				ORDER BY date(c.expires_on) ASC, c.id ASC
+				LIMIT ?
+				""",
+				(day, day, int(reminder_window_days), day, now, day, int(limit)),
+			).fetchall()
+			conn.executemany(
+				"INSERT OR REPLACE INTO reminder_leases (certificate_id, remind_on, owner, expires_at) VALUES (?, ?, ?, ?)",
+				[(int(r["id"]), day, owner, now + lease_seconds) for r in rows],
+			)
+			conn.execute("COMMIT")
+			return [self._row_to_certificate(r) for r in rows]
+		except BaseException:
+			if conn.in_transaction:
+				conn.execute("ROLLBACK")
+			raise
+		finally:
+			conn.close()
+
+	def renew_reminder_leases(self, owner: str, certificate_ids: Iterable[int], today: date, lease_seconds: float) -> Set[int]:
+		# 续期仍归本进程的租约，返回续期成功的证书 id；认领会改写 owner，owner 不是自己说明已被其它进程重新认领
+		day = self._today_string(today)
+		expires_at = time.time() + lease_seconds
+		ids = [int(cid) for cid in certificate_ids]
+		with self.connect() as conn:
+			held: Set[int] = set()
+			for cid in ids:
+				cursor = conn.execute(
+					"UPDATE reminder_leases SET expires_at = ? WHERE certificate_id = ? AND owner = ? AND remind_on = ?",
+					(expires_at, cid, owner, day),
+				)
+				if cursor.rowcount > 0:
+					held.add(cid)
+			return held
+
+	def complete_reminders(self, owner: str, certificate_ids: Iterable[int], today: date) -> int:
+		# 仅当租约仍归本进程所有时才标记已提醒（同一天只标记一次）；单事务标记并释放租约，返回实际标记的条数
+		day = self._today_string(today)
+		now = self._now_string()
+		ids = [int(cid) for cid in certificate_ids]
+		with self.connect() as conn:
+			cursor = conn.executemany(
+				"""
+				UPDATE certificates SET last_reminded_on = ?, updated_at = ?
+				WHERE id = ?
+				  AND EXISTS (SELECT 1 FROM reminder_leases WHERE certificate_id = ? AND owner = ? AND remind_on = ?)
+				""",
+				[(day, now, cid, cid, owner, day) for cid in ids],
+			)
+			marked = cursor.rowcount
+			conn.executemany(
+				"DELETE FROM reminder_leases WHERE certificate_id = ? AND owner = ?",
+				[(cid, owner) for cid in ids],
+			)
+			return marked
+
+	def release_reminder_leases(self, owner: str, certificate_ids: Iterable[int]) -> None:
+		with self.connect() as conn:
+			conn.executemany(
+				"DELETE FROM reminder_leases WHERE certificate_id = ? AND owner = ?",
+				[(int(cid), owner) for cid in certificate_ids],
+			)
+
+	def get_certificate(self, certificate_id: int) -> Optional[Certificate]:
+		with self._read_connection() as conn:
+			row = conn.execute(
+				"SELECT id, name, email, acquired_on, valid_months, expires_on, notes, last_reminded_on, created_at, updated_at FROM certificates WHERE id = ?",
+				(int(certificate_id),),
+			).fetchone()
+			return self._row_to_certificate(row) if row else None
+
+	def list_certificates_page(self, after_id: int, limit: int) -> List[Certificate]:
+		# 按 id 的游标分页：WHERE id > ? 走主键，页码再深也不扫描前面的行
+		with self._read_connection() as conn:
+			rows = conn.execute(
+				"""
+				SELECT id, name, email, acquired_on, valid_months, expires_on, notes, last_reminded_on, created_at, updated_at
+				FROM certificates WHERE id > ? ORDER BY id ASC LIMIT ?
+				""",
+				(int(after_id), int(limit)),
+			).fetchall()
+			return [self._row_to_certificate(r) for r in rows]
+
+	def add_certificates(self, items: Iterable[Tuple[str, str, date, int, date, Optional[str]]]) -> List[int]:
+		# items: (name, email, acquired_on, valid_months, expires_on, notes)；单事务，任一失败整体回滚
+		now = self._now_string()
+		ids: List[int] = []
+		with self.connect() as conn:
+			for name, email, acquired_on, valid_months, expires_on, notes in items:
+				cursor = conn.execute(
+					"""
+					INSERT INTO certificates (name, email, acquired_on, valid_months, expires_on, notes, last_reminded_on, created_at, updated_at)
+					VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?)
+					""",
+					(
+						name,
+						email,
+						acquired_on.strftime("%Y-%m-%d"),
+						int(valid_months),
+						expires_on.strftime("%Y-%m-%d"),
+						notes,
+						now,
+						now,
+					),
+				)
+				ids.append(int(cursor.lastrowid))
+		return ids
+
+	def update_certificate(
+		self,
+		certificate_id: int,
+		name: str,
+		email: str,
+		acquired_on: date,
+		valid_months: int,
+		expires_on: date,
+		notes: Optional[str],
+	) -> bool:
+		with self.connect() as conn:
+			cursor = conn.execute(
+				"""
+				UPDATE certificates
+				SET name = ?, email = ?, acquired_on = ?, valid_months = ?, expires_on = ?, notes = ?, updated_at = ?
+				WHERE id = ?
+				""",
+				(
+					name,
+					email,
+					acquired_on.strftime("%Y-%m-%d"),
+					int(valid_months),
+					expires_on.strftime("%Y-%m-%d"),
+					notes,
+					self._now_string(),
+					int(certificate_id),
+				),
+			)
+			return cursor.rowcount > 0
+
+	def remove_certificates(self, certificate_ids: Iterable[int]) -> List[bool]:
+		# 单事务批量删除，按输入顺序返回每个 id 是否删除成功
+		result: List[bool] = []
+		with self.connect() as conn:
+			for cid in certificate_ids:
+				cursor = conn.execute("DELETE FROM certificates WHERE id = ?", (int(cid),))
+				result.append(cursor.rowcount > 0)
+		return result
+
+	def latest_change_seq(self) -> int:
+		with self._read_connection() as conn:
+			row = conn.execute("SELECT MAX(seq) FROM changes").fetchone()
+			return int(row[0] or 0)
+
+	def list_changes(self, since: int, limit: int = 500) -> Tuple[List[Change], int, bool]:
+		# 返回 (变更, 最新 seq, 是否需要全量重载)；同一证书只保留最后一次变更，并附带当前行数据
+		with self._read_connection() as conn:
+			bounds = conn.execute("SELECT MIN(seq), MAX(seq) FROM changes").fetchone()
+			min_seq, max_seq = int(bounds[0] or 0), int(bounds[1] or 0)
+			# since 早于已压缩的范围时，客户端无法补齐增量，需要重新加载
+			if since > max_seq or (since < max_seq and min_seq > since + 1):
+				return [], max_seq, True
+			rows = conn.execute(
+				"""
+				SELECT ch.seq, ch.op, ch.certificate_id,
+					c.id, c.name, c.email, c.acquired_on, c.valid_months, c.expires_on, c.notes, c.last_reminded_on, c.created_at, c.updated_at
+				FROM changes ch
+				LEFT JOIN certificates c ON c.id = ch.certificate_id
+				WHERE ch.seq IN (
+					SELECT MAX(seq) FROM changes WHERE seq > ? GROUP BY certificate_id
+				)
+				ORDER BY ch.seq ASC
+				LIMIT ?
+				""",
+				(int(since), int(limit)),
+			).fetchall()
+			result: List[Change] = []
+			for r in rows:
+				cert = self._row_to_certificate(r) if r["id"] is not None else None
+				op = "upsert" if cert is not None else "delete"
+				result.append(Change(seq=int(r["seq"]), op=op, certificate_id=int(r["certificate_id"]), certificate=cert))
+			last = result[-1].seq if len(result) == int(limit) else max_seq
+			return result, last, False
+
+	def compact_changes(self, keep: int) -> int:
+		# 按 seq 压缩：只保留最近 keep 条
+		with self.connect() as conn:
+			cursor = conn.execute(
+				"DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?",
+				(int(keep),),
+			)
+			return cursor.rowcount
+
+	def fetch_expiry_chunk(self, after_id: int, limit: int, where: Optional[str] = None) -> List[Tuple[int, str, int, str]]:
+		# 按 id 游标流式读取；where 为 CLI 传入的附加 SQL 条件（仅供管理员在本机使用）
+		extra = f"AND ({where})" if where else ""
+		with self.connect() as conn:
+			rows = conn.execute(
+				f"""
+				SELECT id, acquired_on, valid_months, expires_on FROM certificates
+				WHERE id > ? AND valid_months > 0 {extra}
+				ORDER BY id ASC LIMIT ?
+				""",
+				(int(after_id), int(limit)),
+			).fetchall()
+			return [(int(r[0]), str(r[1]), int(r[2]), str(r[3])) for r in rows]
+
+	def update_expiries(self, updates: Iterable[Tuple[str, int]]) -> None:
+		# updates: (expires_on, id)；单事务批量写回
+		now = self._now_string()
+		with self.connect() as conn:
+			conn.executemany(
+				"UPDATE certificates SET expires_on = ?, updated_at = ? WHERE id = ?",
+				[(expires_on, now, cid) for expires_on, cid in updates],
+			)
+
+	_FORECAST_DAYS_CTE = """
+		WITH RECURSIVE days(d) AS (
+			SELECT date(?)
+			UNION ALL
+			SELECT date(d, '+1 day') FROM days WHERE d < date(?, '+' || (? - 1) || ' days')
+		)
+	"""
+
+	def forecast_daily_reminders(self, start: date, days: int, reminder_window_days: int) -> List[Tuple[date, int, int]]:
+		# 每天 (日期, 逐证书模式邮件数, 摘要模式邮件数=不同收件人数)；expires_on 为 YYYY-MM-DD 字符串，可直接按索引做区间比较
+		day = self._today_string(start)
+		with self._read_connection() as conn:
+			rows = conn.execute(
+				self._FORECAST_DAYS_CTE
+				+ """
+				SELECT days.d AS d, COUNT(c.id) AS emails, COUNT(DISTINCT c.email) AS recipients
+				FROM days
+				LEFT JOIN certificates c
+					ON c.expires_on >= days.d AND c.expires_on <= date(days.d, '+' || ? || ' days')
+				GROUP BY days.d
+				ORDER BY days.d ASC
+				""",
+				(day, day, int(days), int(reminder_window_days)),
+			).fetchall()
+			return [
+				(datetime.strptime(str(r["d"]), "%Y-%m-%d").date(), int(r["emails"]), int(r["recipients"]))
+				for r in rows
+			]
+
+	def forecast_recipient_load(self, start: date, days: int, reminder_window_days: int, limit: int = 10) -> List[Tuple[str, int, int]]:
+		# 每个收件人在预测期内 (邮箱, 逐证书模式邮件数, 摘要模式邮件数=有提醒的天数)
+		day = self._today_string(start)
+		with self._read_connection() as conn:
+			rows = conn.execute(
+				self._FORECAST_DAYS_CTE
+				+ """
+				SELECT c.email AS email, COUNT(*) AS emails, COUNT(DISTINCT days.d) AS digest_emails
+				FROM days
+				JOIN certificates c
+					ON c.expires_on >= days.d AND c.expires_on <= date(days.d, '+' || ? || ' days')
+				GROUP BY c.email
+				ORDER BY emails DESC, c.email ASC
+				LIMIT ?
+				""",
+				(day, day, int(days), int(reminder_window_days), int(limit)),
+			).fetchall()
+			return [(str(r["email"]), int(r["emails"]), int(r["digest_emails"])) for r in rows]
+
+	def forecast_recipient_days(self, start: date, days: int, reminder_window_days: int) -> List[Tuple[str, date, int]]:
+		# 预测期内每个 (收件人, 日期) 的逐证书邮件数，供分片模式跨库合并后再去重、取 top
+		day = self._today_string(start)
+		with self._read_connection() as conn:
+			rows = conn.execute(
+				self._FORECAST_DAYS_CTE
+				+ """
+				SELECT c.email AS email, days.d AS d, COUNT(*) AS emails
+				FROM days
+				JOIN certificates c
+					ON c.expires_on >= days.d AND c.expires_on <= date(days.d, '+' || ? || ' days')
+				GROUP BY c.email, days.d
+				""",
+				(day, day, int(days), int(reminder_window_days)),
+			).fetchall()
+			return [
+				(str(r["email"]), datetime.strptime(str(r["d"]), "%Y-%m-%d").date(), int(r["emails"]))
+				for r in rows
+			]
+
+	def expiry_bucket_counts(self, today: date) -> Dict[str, int]:
+		# 单条分组查询：WHERE 区间条件走 expires_on 索引，永久记录（9999-12-31）不在范围内
+		day = self._today_string(today)
+		with self._read_connection() as conn:
+			rows = conn.execute(
+				"""
+				SELECT
+					CASE
+						WHEN expires_on < ? THEN 'expired'
+						WHEN expires_on <= date(?, '+7 days') THEN 'within_7'
+						WHEN expires_on <= date(?, '+30 days') THEN 'within_30'
+						ELSE 'within_90'
+					END AS bucket,
+					COUNT(*) AS n
+				FROM certificates
+				WHERE expires_on <= date(?, '+90 days')
+				GROUP BY bucket
+				""",
+				(day, day, day, day),
+			).fetchall()
+			return {str(r["bucket"]): int(r["n"]) for r in rows}
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import os
 import smtplib
+import socket
+import subprocess
+import time
+import uuid
+from abc import ABC, abstractmethod
 from email.message import EmailMessage
-from typing import Optional
+from pathlib import Path
+from typing import Callable, Optional, Sequence
 import ssl as _ssl
 
-from .config import SMTPConfig
+from .config import MailConfig, SMTPConfig
 
 
 def _connect(smtp: SMTPConfig) -> smtplib.SMTP:
@@ -35,16 +42,151 @@ def _connect(smtp: SMTPConfig) -> smtplib.SMTP:
 	return server
 
 
-def send_email(smtp: SMTPConfig, to_email: str, subject: str, body: str) -> None:
+def build_message(from_email: str, to_email: str, subject: str, body: str) -> EmailMessage:
 	msg = EmailMessage()
-	msg["From"] = smtp.from_email
+	msg["From"] = from_email
 	msg["To"] = to_email
 	msg["Subject"] = subject
 	msg.set_content(body)
+	return msg
 
-	server = _connect(smtp)
-	try:
-		server.send_message(msg)
-	finally:
-		server.quit()
+
+class MailBatchError(RuntimeError):
+	# sent：失败前已成功交付的消息数（按传入顺序），调用方据此只标记已发送部分
+	def __init__(self, sent: int, cause: BaseException) -> None:
+		super().__init__(f"批量发送在第 {sent + 1} 封失败: {cause}")
+		self.sent = sent
+		self.cause = cause
+
+
+# before_send(i)：交付第 i 封前调用，返回 False 时停止本批（已交付的条数照常返回）
+BeforeSend = Optional[Callable[[int], bool]]
+
+
+class MailTransport(ABC):
+	@abstractmethod
+	def send_batch(self, messages: Sequence[EmailMessage], before_send: BeforeSend = None) -> int:
+		...
+
+
+class SMTPTransport(MailTransport):
+	# 整批复用一条 SMTP 连接
+	def __init__(self, smtp: SMTPConfig) -> None:
+		self._smtp = smtp
+
+	def send_batch(self, messages: Sequence[EmailMessage], before_send: BeforeSend = None) -> int:
+		if not messages:
+			return 0
+		sent = 0
+		server = _connect(self._smtp)
+		try:
+			for i, msg in enumerate(messages):
+				if before_send is not None and not before_send(i):
+					break
+				try:
+					server.send_message(msg)
+				except (smtplib.SMTPException, OSError) as e:
+					raise MailBatchError(sent, e) from e
+				sent += 1
+		finally:
+			try:
+				server.quit()
+			except (smtplib.SMTPException, OSError):
+				pass
+		return sent
+
+
+class _PipeSMTP(smtplib.SMTP):
+	# 通过 socketpair 与 `sendmail -bs` 的 stdin/stdout 以 SMTP 协议对话
+	def __init__(self, sock: socket.socket) -> None:
+		super().__init__()
+		self.sock = sock
+		code, msg = self.getreply()
+		if code != 220:
+			raise smtplib.SMTPConnectError(code, msg)
+
+
+class SendmailTransport(MailTransport):
+	# `sendmail -t` 每个进程只能投递一封；改用 `sendmail -bs`（Postfix/Exim/Sendmail 均支持），
+	# 一个进程即可在同一会话中交付整批邮件
+	def __init__(self, sendmail_path: str) -> None:
+		self._sendmail_path = sendmail_path
+
+	def send_batch(self, messages: Sequence[EmailMessage], before_send: BeforeSend = None) -> int:
+		if not messages:
+			return 0
+		ours, theirs = socket.socketpair()
+		try:
+			proc = subprocess.Popen([self._sendmail_path, "-bs"], stdin=theirs, stdout=theirs, stderr=subprocess.DEVNULL)
+		except OSError as e:
+			ours.close()
+			theirs.close()
+			raise MailBatchError(0, e) from e
+		theirs.close()
+		# 与 SMTP 直连一致的超时：MTA 挂起时读写抛出超时而不是永久阻塞
+		ours.settimeout(30)
+		sent = 0
+		try:
+			server = _PipeSMTP(ours)
+			server.ehlo_or_helo_if_needed()
+			for i, msg in enumerate(messages):
+				if before_send is not None and not before_send(i):
+					break
+				server.send_message(msg)
+				sent += 1
+			server.quit()
+		except (smtplib.SMTPException, OSError) as e:
+			# 会话已出错（含超时）的 MTA 进程不再等待其自行退出
+			proc.kill()
+			raise MailBatchError(sent, e) from e
+		finally:
+			ours.close()
+			try:
+				proc.wait(timeout=30)
+			except subprocess.TimeoutExpired:
+				proc.kill()
+		return sent
+
+
+class SpoolTransport(MailTransport):
+	# maildir 布局：先写 tmp/ 再原子重命名到 new/，中继进程只会看到完整文件
+	def __init__(self, spool_dir: str) -> None:
+		self._root = Path(spool_dir)
+
+	def send_batch(self, messages: Sequence[EmailMessage], before_send: BeforeSend = None) -> int:
+		tmp_dir = self._root / "tmp"
+		new_dir = self._root / "new"
+		tmp_dir.mkdir(parents=True, exist_ok=True)
+		new_dir.mkdir(parents=True, exist_ok=True)
+		host = socket.gethostname().replace("/", "_").replace(":", "_")
+		sent = 0
+		for i, msg in enumerate(messages):
+			if before_send is not None and not before_send(i):
+				break
+			name = f"{int(time.time())}.{os.getpid()}_{uuid.uuid4().hex}.{host}.eml"
+			try:
+				with (tmp_dir / name).open("wb") as f:
+					f.write(msg.as_bytes())
+					f.flush()
+					os.fsync(f.fileno())
+				os.replace(tmp_dir / name, new_dir / name)
+			except OSError as e:
+				raise MailBatchError(sent, e) from e
+			sent += 1
+		return sent
+
+
+def make_transport(mail: MailConfig, smtp: SMTPConfig) -> MailTransport:
+	kind = (mail.transport or "smtp").lower()
+	if kind == "smtp":
+		return SMTPTransport(smtp)
+	if kind == "sendmail":
+		return SendmailTransport(mail.sendmail_path)
+	if kind in ("spool", "maildir"):
+		spool = Path(mail.spool_dir)
+		if not spool.is_absolute():
+			# 与数据库路径一致：相对路径以项目根目录为基准
+			spool = Path(__file__).resolve().parent.parent / spool
+		return SpoolTransport(spool.as_posix())
+	raise ValueError(f"未知的邮件发送方式: {mail.transport}（可选 smtp / sendmail / spool）")
 
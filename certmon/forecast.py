@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .config import Config
+from .db import Database
+from .sharding import ShardedDatabase
+
+FORECAST_MODES = ("certificate", "digest")
+
+
+@dataclass
+class ForecastDay:
+	day: date
+	emails: int
+	digest_emails: int
+	over_quota: bool = False
+
+
+@dataclass
+class RecipientLoad:
+	email: str
+	emails: int
+	digest_emails: int
+
+
+@dataclass
+class Forecast:
+	start: date
+	days: int
+	mode: str
+	quota: Optional[int]
+	daily: List[ForecastDay] = field(default_factory=list)
+	recipients: List[RecipientLoad] = field(default_factory=list)
+
+	@property
+	def peak(self) -> Optional[ForecastDay]:
+		if not self.daily:
+			return None
+		return max(self.daily, key=lambda d: self.count(d))
+
+	def count(self, day: ForecastDay) -> int:
+		return day.digest_emails if self.mode == "digest" else day.emails
+
+
+def build_forecast(
+	config: Config,
+	db: Database | ShardedDatabase,
+	start: date,
+	days: int,
+	mode: str = "certificate",
+	top: int = 10,
+) -> Forecast:
+	# 聚合查询直接得出每天的发送量，不逐日模拟 send_due_reminders
+	if mode not in FORECAST_MODES:
+		raise ValueError(f"未知模式: {mode}（可选 {' / '.join(FORECAST_MODES)}）")
+	window = int(config.app.reminder_window_days)
+	quota = config.app.daily_send_quota
+	forecast = Forecast(start=start, days=days, mode=mode, quota=quota)
+	if isinstance(db, ShardedDatabase):
+		# 先按 (收件人, 日期) 合并各分片的完整结果，再统计去重后的摘要数并取 top，
+		# 同一收件人分布在多个分片时既不重复计数，也不会因各分片先截断而漏算
+		per_shard = db.fan_out(lambda d: d.forecast_recipient_days(start, days, window))
+		pairs: Dict[Tuple[str, date], int] = {}
+		for rows in per_shard.values():
+			for email, day, emails in rows:
+				pairs[(email, day)] = pairs.get((email, day), 0) + emails
+		by_day: Dict[date, List[int]] = {start + timedelta(days=i): [0, 0] for i in range(days)}
+		loads: Dict[str, List[int]] = {}
+		for (email, day), emails in pairs.items():
+			acc = by_day.setdefault(day, [0, 0])
+			acc[0] += emails
+			acc[1] += 1
+			load = loads.setdefault(email, [0, 0])
+			load[0] += emails
+			load[1] += 1
+		daily = [(day, acc[0], acc[1]) for day, acc in sorted(by_day.items())]
+		recipients = sorted(((e, a[0], a[1]) for e, a in loads.items()), key=lambda r: (-r[1], r[0]))[:top]
+	else:
+		daily = db.forecast_daily_reminders(start, days, window)
+		recipients = db.forecast_recipient_load(start, days, window, top)
+	for day, emails, digest in daily:
+		item = ForecastDay(day=day, emails=emails, digest_emails=digest)
+		item.over_quota = quota is not None and forecast.count(item) > quota
+		forecast.daily.append(item)
+	forecast.recipients = [RecipientLoad(email=e, emails=n, digest_emails=d) for e, n, d in recipients]
+	return forecast
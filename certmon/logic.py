@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
-from typing import List
+from email.message import EmailMessage
+from typing import List, Optional
 
 from .config import Config, SMTPConfig
 from .db import Certificate, Database
-from .emailer import send_email
+from .sharding import ShardedDatabase
+from .emailer import MailBatchError, build_message, make_transport
 
 
 def _days_until(expiry: date, today: date) -> int:
@@ -28,27 +36,80 @@ def _resolve_smtp_config(config: Config, db: Database) -> SMTPConfig:
 	return config.smtp
 
 
-def send_due_reminders(config: Config, db: Database, today: date) -> int:
+def _lease_owner() -> str:
+	return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _reminder_message(from_email: str, cert: Certificate, today: date) -> EmailMessage:
+	# 认领查询已限定 expires_on >= today，days_left 不会为负
+	days_left = _days_until(cert.expires_on, today)
+	subject = f"证书到期提醒: {cert.name}"
+	body = (
+		f"证书: {cert.name}\n"
+		f"到期日期: {cert.expires_on.strftime('%Y-%m-%d')}\n"
+		f"剩余天数: {days_left} 天\n"
+		f"备注: {cert.notes or '-'}\n\n"
+		f"此邮件由证书到期提醒服务自动发送。"
+	)
+	return build_message(from_email, cert.email, subject, body)
+
+
+def send_due_reminders(config: Config, db: Database, today: date, owner: Optional[str] = None, smtp_conf: Optional[SMTPConfig] = None) -> int:
+	# 按块认领（租约）→ 整块一次交给邮件通道 → 批量标记；多个进程/主机可同时运行而不会重复标记
 	window = int(config.app.reminder_window_days)
-	due: List[Certificate] = db.query_due_for_reminders(today, window)
+	batch_size = max(1, int(config.app.reminder_batch_size))
+	lease_seconds = float(config.app.reminder_lease_seconds)
+	owner = owner or _lease_owner()
 	sent = 0
-	smtp_conf = _resolve_smtp_config(config, db)
-	for cert in due:
-		if cert.last_reminded_on == today:
-			continue
-		days_left = _days_until(cert.expires_on, today)
-		if days_left < 0:
-			continue
-		subject = f"证书到期提醒: {cert.name}"
-		body = (
-			f"证书: {cert.name}\n"
-			f"到期日期: {cert.expires_on.strftime('%Y-%m-%d')}\n"
-			f"剩余天数: {days_left} 天\n"
-			f"备注: {cert.notes or '-'}\n\n"
-			f"此邮件由证书到期提醒服务自动发送。"
-		)
-		send_email(smtp_conf, cert.email, subject, body)
-		db.set_last_reminded_today(cert.id, today)
-		sent += 1
-	return sent
+	smtp_conf = smtp_conf or _resolve_smtp_config(config, db)
+	transport = make_transport(config.mail, smtp_conf)
+	while True:
+		renewed_at = time.monotonic()
+		due: List[Certificate] = db.claim_reminder_batch(owner, today, window, batch_size, lease_seconds)
+		if not due:
+			return sent
+		ids = [cert.id for cert in due]
+		messages = [_reminder_message(smtp_conf.from_email, cert, today) for cert in due]
+
+		def before_send(index: int) -> bool:
+			# 发送较慢（如 SMTP 超时）时整块可能超过租约时长：租约过半即续期整块（已发送未标记的也要保留），
+			# 当前证书的租约已被其它进程认领则停止本块，避免重复发送
+			nonlocal renewed_at
+			if time.monotonic() - renewed_at < lease_seconds / 2:
+				return True
+			try:
+				held = db.renew_reminder_leases(owner, ids, today, lease_seconds)
+			except sqlite3.Error:
+				return False
+			renewed_at = time.monotonic()
+			return ids[index] in held
+
+		try:
+			delivered = transport.send_batch(messages, before_send=before_send)
+		except MailBatchError as e:
+			# 只标记失败前已交付的部分，其余租约释放，交由其它进程或下次运行处理
+			sent += db.complete_reminders(owner, [cert.id for cert in due[:e.sent]], today)
+			db.release_reminder_leases(owner, [cert.id for cert in due[e.sent:]])
+			raise
+		except BaseException:
+			db.release_reminder_leases(owner, [cert.id for cert in due])
+			raise
+		sent += db.complete_reminders(owner, [cert.id for cert in due[:delivered]], today)
+		if delivered < len(due):
+			db.release_reminder_leases(owner, [cert.id for cert in due[delivered:]])
+
+
+def send_due_reminders_parallel(config: Config, db: Database, today: date, workers: int = 1, smtp_conf: Optional[SMTPConfig] = None) -> int:
+	# 同一进程内多个发送者，各自持有独立租约
+	if workers <= 1:
+		return send_due_reminders(config, db, today, smtp_conf=smtp_conf)
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		futures = [pool.submit(send_due_reminders, config, db, today, smtp_conf=smtp_conf) for _ in range(workers)]
+		return sum(f.result() for f in futures)
+
 
+def send_due_reminders_sharded(config: Config, sharded: ShardedDatabase, today: date, workers: int = 1) -> int:
+	# 各分片独立认领与发送，互不等待对方的写锁；每个分片启动 workers 个发送者。SMTP 设置只保存在默认分片，统一解析一次
+	smtp_conf = _resolve_smtp_config(config, sharded.shard())
+	counts = sharded.fan_out(lambda db: send_due_reminders_parallel(config, db, today, workers, smtp_conf=smtp_conf))
+	return sum(counts.values())
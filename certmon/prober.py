@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import ssl
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .db import Database, Endpoint
+from .x509 import X509ParseError, parse_der
+
+
+@dataclass
+class ProbeResult:
+	endpoint_id: int
+	certificate_id: Optional[int]
+	not_before: Optional[date]
+	not_after: Optional[date]
+	error: Optional[str]
+
+
+@dataclass
+class ProbeSummary:
+	probed: int = 0
+	failed: int = 0
+	certificates_updated: int = 0
+
+
+def _make_context() -> ssl.SSLContext:
+	# 只为读取证书到期日：不校验证书链与主机名，否则已过期/自签名证书无法被记录
+	ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+	ctx.check_hostname = False
+	ctx.verify_mode = ssl.CERT_NONE
+	return ctx
+
+
+async def _fetch_peer_certificate(host: str, port: int, server_name: Optional[str], ctx: ssl.SSLContext, timeout: float) -> bytes:
+	reader, writer = await asyncio.wait_for(
+		asyncio.open_connection(host, port, ssl=ctx, server_hostname=server_name or host),
+		timeout,
+	)
+	try:
+		ssl_object = writer.get_extra_info("ssl_object")
+		der = ssl_object.getpeercert(binary_form=True) if ssl_object is not None else None
+		if not der:
+			raise ssl.SSLError("对端未提供证书")
+		return der
+	finally:
+		writer.close()
+		try:
+			await asyncio.wait_for(writer.wait_closed(), timeout)
+		except (asyncio.TimeoutError, OSError, ssl.SSLError):
+			pass
+
+
+async def _probe_one(
+	ep: Endpoint,
+	ctx: ssl.SSLContext,
+	timeout: float,
+	global_limit: asyncio.Semaphore,
+	host_limits: Dict[str, asyncio.Semaphore],
+) -> ProbeResult:
+	# 先取主机槽位再取全局槽位：等待同一主机的任务不占用全局并发，其它主机可继续探测
+	async with host_limits[ep.host], global_limit:
+		try:
+			der = await _fetch_peer_certificate(ep.host, ep.port, ep.server_name, ctx, timeout)
+			info = parse_der(der)
+		except asyncio.TimeoutError:
+			return ProbeResult(ep.id, ep.certificate_id, None, None, f"超时（{timeout:g} 秒）")
+		except (OSError, ssl.SSLError, X509ParseError) as e:
+			return ProbeResult(ep.id, ep.certificate_id, None, None, str(e) or e.__class__.__name__)
+		return ProbeResult(ep.id, ep.certificate_id, info.not_before, info.not_after, None)
+
+
+async def probe_endpoints(
+	endpoints: Sequence[Endpoint],
+	concurrency: int = 100,
+	per_host_limit: int = 4,
+	timeout: float = 10.0,
+	batch_size: int = 200,
+	on_batch: Optional[Callable[[List[ProbeResult]], None]] = None,
+) -> List[ProbeResult]:
+	# concurrency 限制总连接数，per_host_limit 限制同一主机的并发连接（多个 SNI 共用一个 IP 时避免压垮对端）
+	ctx = _make_context()
+	global_limit = asyncio.Semaphore(max(1, concurrency))
+	host_limits: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(max(1, per_host_limit)))
+	tasks = [asyncio.ensure_future(_probe_one(ep, ctx, timeout, global_limit, host_limits)) for ep in endpoints]
+	results: List[ProbeResult] = []
+	batch: List[ProbeResult] = []
+	for fut in asyncio.as_completed(tasks):
+		res = await fut
+		results.append(res)
+		batch.append(res)
+		if on_batch is not None and len(batch) >= batch_size:
+			on_batch(batch)
+			batch = []
+	if on_batch is not None and batch:
+		on_batch(batch)
+	return results
+
+
+def probe_all(
+	db: Database,
+	concurrency: int = 100,
+	per_host_limit: int = 4,
+	timeout: float = 10.0,
+	batch_size: int = 200,
+) -> ProbeSummary:
+	summary = ProbeSummary()
+
+	def write_batch(batch: List[ProbeResult]) -> None:
+		summary.certificates_updated += db.record_probe_results(
+			(r.endpoint_id, r.certificate_id, r.not_before, r.not_after, r.error) for r in batch
+		)
+
+	results = asyncio.run(
+		probe_endpoints(
+			db.list_endpoints(),
+			concurrency=concurrency,
+			per_host_limit=per_host_limit,
+			timeout=timeout,
+			batch_size=batch_size,
+			on_batch=write_batch,
+		)
+	)
+	summary.probed = len(results)
+	summary.failed = sum(1 for r in results if r.error is not None)
+	return summary
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from .dateutil import add_months
+from .db import Database
+
+
+@dataclass
+class RecomputeResult:
+	scanned: int = 0
+	changed: int = 0
+	# (id, 原到期日, 新到期日)，仅保留前若干条供 dry-run 展示
+	samples: List[Tuple[int, str, str]] = field(default_factory=list)
+
+
+@lru_cache(maxsize=65536)
+def _expiry_string(acquired_on: str, months: int) -> str:
+	# 大量记录共享相同的 (获取日期, 月数)，缓存后每种组合只计算一次
+	return add_months(date.fromisoformat(acquired_on), months).strftime("%Y-%m-%d")
+
+
+def recompute_expiry(
+	db: Database,
+	where: Optional[str] = None,
+	dry_run: bool = False,
+	chunk_size: int = 5000,
+	sample_limit: int = 20,
+) -> RecomputeResult:
+	# 仅处理 valid_months > 0 的记录：永久（-1）与直接指定到期日（0）没有可重算的依据
+	result = RecomputeResult()
+	last_id = 0
+	while True:
+		rows = db.fetch_expiry_chunk(last_id, chunk_size, where)
+		if not rows:
+			return result
+		last_id = rows[-1][0]
+		updates = []
+		for cid, acquired_on, valid_months, expires_on in rows:
+			new_expiry = _expiry_string(acquired_on, valid_months)
+			if new_expiry != expires_on:
+				updates.append((new_expiry, cid))
+				if len(result.samples) < sample_limit:
+					result.samples.append((cid, expires_on, new_expiry))
+		result.scanned += len(rows)
+		result.changed += len(updates)
+		if updates and not dry_run:
+			db.update_expiries(updates)
+		if len(rows) < chunk_size:
+			return result
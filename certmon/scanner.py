@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .db import Database
+from .x509 import X509ParseError, parse_certificate_bytes
+
+
+CERT_SUFFIXES = (".pem", ".crt", ".cer", ".cert", ".der")
+
+# 单个证书文件的大小上限，避免误扫到大文件
+MAX_FILE_BYTES = 1024 * 1024
+
+
+@dataclass
+class ScanResult:
+	files_seen: int = 0
+	files_skipped: int = 0
+	inserted: int = 0
+	updated: int = 0
+	errors: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _iter_candidate_files(root: Path) -> List[Tuple[str, int, int]]:
+	found: List[Tuple[str, int, int]] = []
+	for dirpath, _dirnames, filenames in os.walk(root):
+		for fn in filenames:
+			if not fn.lower().endswith(CERT_SUFFIXES):
+				continue
+			full = os.path.join(dirpath, fn)
+			try:
+				st = os.stat(full)
+			except OSError:
+				continue
+			if st.st_size > MAX_FILE_BYTES:
+				continue
+			found.append((os.path.abspath(full), st.st_mtime_ns, st.st_size))
+	return found
+
+
+def _parse_file(path: str) -> Tuple[str, Optional[tuple], Optional[str]]:
+	# 在子进程中执行：返回 (path, (fingerprint, subject, not_before, not_after) 或 None, 错误信息)
+	try:
+		with open(path, "rb") as f:
+			info = parse_certificate_bytes(f.read())
+		return path, (info.fingerprint, info.subject, info.not_before, info.not_after), None
+	except (OSError, X509ParseError) as e:
+		return path, None, str(e)
+
+
+def scan_directory(db: Database, root: str, email: str, workers: Optional[int] = None, batch_size: int = 500) -> ScanResult:
+	result = ScanResult()
+	cache = db.get_scan_cache()
+	candidates = _iter_candidate_files(Path(root))
+	result.files_seen = len(candidates)
+
+	changed = [c for c in candidates if cache.get(c[0]) != (c[1], c[2])]
+	result.files_skipped = result.files_seen - len(changed)
+	if not changed:
+		return result
+
+	stats = {path: (mtime_ns, size) for path, mtime_ns, size in changed}
+	paths = [c[0] for c in changed]
+	pending: List[tuple] = []
+	failed: List[Tuple[str, int, int]] = []
+
+	def flush() -> None:
+		if pending:
+			inserted, updated = db.upsert_scanned_certificates(pending, email)
+			result.inserted += inserted
+			result.updated += updated
+			pending.clear()
+		if failed:
+			db.mark_scan_failures(failed)
+			failed.clear()
+
+	# 文件少时不值得启动进程池
+	if len(paths) < 32 or workers == 1:
+		parsed = map(_parse_file, paths)
+		executor = None
+	else:
+		executor = ProcessPoolExecutor(max_workers=workers)
+		chunk = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))
+		parsed = executor.map(_parse_file, paths, chunksize=min(chunk, 256))
+	try:
+		for path, info, error in parsed:
+			mtime_ns, size = stats[path]
+			if info is None:
+				result.errors.append((path, error or "未知错误"))
+				failed.append((path, mtime_ns, size))
+			else:
+				fingerprint, subject, not_before, not_after = info
+				name = subject or Path(path).name
+				pending.append((path, mtime_ns, size, fingerprint, name, not_before, not_after))
+			if len(pending) + len(failed) >= batch_size:
+				flush()
+		flush()
+	finally:
+		if executor is not None:
+			executor.shutdown()
+	return result
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .db import ArchivedCertificate, Certificate, Database
+
+T = TypeVar("T")
+
+
+def _merge_by_expiry(per_shard: Dict[str, List[T]]) -> List[Tuple[str, T]]:
+	# 各分片结果均已按 (expires_on, id) 排序，k 路归并即可得到全局有序结果
+	streams = [
+		[((c.expires_on, c.id, name), name, c) for c in certs]  # type: ignore[attr-defined]
+		for name, certs in per_shard.items()
+	]
+	return [(name, c) for _, name, c in heapq.merge(*streams, key=lambda item: item[0])]
+
+
+class ShardedDatabase:
+	# 每个租户/部门一个 SQLite 文件：写入只落到单个分片，列表等查询并行扇出后归并
+	def __init__(self, shards: Dict[str, Database], default_shard: Optional[str] = None) -> None:
+		if not shards:
+			raise ValueError("至少需要一个分片")
+		self._shards = dict(shards)
+		self.default_shard = default_shard or next(iter(self._shards))
+		if self.default_shard not in self._shards:
+			raise ValueError(f"默认分片不存在: {self.default_shard}")
+
+	@property
+	def names(self) -> List[str]:
+		return list(self._shards)
+
+	def shard(self, name: Optional[str] = None) -> Database:
+		key = name or self.default_shard
+		if key not in self._shards:
+			raise KeyError(f"未知分片: {key}")
+		return self._shards[key]
+
+	def fan_out(self, fn: Callable[[Database], T]) -> Dict[str, T]:
+		if len(self._shards) == 1:
+			return {name: fn(db) for name, db in self._shards.items()}
+		with ThreadPoolExecutor(max_workers=len(self._shards)) as pool:
+			futures = {name: pool.submit(fn, db) for name, db in self._shards.items()}
+			return {name: f.result() for name, f in futures.items()}
+
+	def initialize_schema(self) -> None:
+		self.fan_out(lambda db: db.initialize_schema())
+
+	def list_certificates(self) -> List[Tuple[str, Certificate]]:
+		return _merge_by_expiry(self.fan_out(lambda db: db.list_certificates()))
+
+	def list_archived_certificates(self) -> List[Tuple[str, ArchivedCertificate]]:
+		return _merge_by_expiry(self.fan_out(lambda db: db.list_archived_certificates()))
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+# 每个 worker 持有一份数据库的内存副本，仅供读取。
+# 通过一条只读的磁盘连接观察 PRAGMA data_version：其它连接（Web 写入、提醒任务）
+# 提交后该值变化，下次读取前用 backup API 重新复制到内存。
+# 副本是一个共享缓存的命名内存库，每次查询各自打开一条连接，查询期间不持有任何锁；
+# 刷新时复制到新名字的内存库，再在锁内替换，旧库在最后一条读连接关闭后释放。
+class ReadSnapshot:
+	def __init__(self, database_path: str) -> None:
+		self._path = Path(database_path)
+		self._name = f"certmon-snapshot-{uuid.uuid4().hex}"
+		# _lock 只保护下面几个字段的读取与替换；复制在 _refresh_lock 下进行，不阻塞读取
+		self._lock = threading.Lock()
+		self._refresh_lock = threading.Lock()
+		self._watch: Optional[sqlite3.Connection] = None
+		# 保持当前内存库存活的连接
+		self._anchor: Optional[sqlite3.Connection] = None
+		self._uri: Optional[str] = None
+		self._version: Optional[int] = None
+		self._generation = 0
+
+	def _data_version(self) -> int:
+		if self._watch is None:
+			self._watch = sqlite3.connect(self._path.as_posix(), check_same_thread=False)
+		return int(self._watch.execute("PRAGMA data_version").fetchone()[0])
+
+	@staticmethod
+	def _open(uri: str) -> sqlite3.Connection:
+		conn = sqlite3.connect(uri, uri=True)
+		conn.row_factory = sqlite3.Row
+		return conn
+
+	def _open_current(self) -> Optional[sqlite3.Connection]:
+		# 必须在锁内打开：否则刷新可能先关闭旧库的 anchor，按同名 URI 连上的会是一个空库
+		with self._lock:
+			if self._uri is None or self._data_version() != self._version:
+				return None
+			return self._open(self._uri)
+
+	def _refresh(self) -> sqlite3.Connection:
+		with self._refresh_lock:
+			# 等待期间可能已有其它线程刷新完毕
+			conn = self._open_current()
+			if conn is not None:
+				return conn
+			with self._lock:
+				# 先取版本再复制：复制期间的新提交会让下次检查再次刷新
+				version = self._data_version()
+				self._generation += 1
+				uri = f"file:{self._name}-{self._generation}?mode=memory&cache=shared"
+			anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+			source = sqlite3.connect(self._path.as_posix())
+			try:
+				source.backup(anchor)
+			except BaseException:
+				anchor.close()
+				raise
+			finally:
+				source.close()
+			with self._lock:
+				old = self._anchor
+				self._anchor, self._uri, self._version = anchor, uri, version
+				conn = self._open(uri)
+			if old is not None:
+				old.close()
+			return conn
+
+	@contextmanager
+	def connection(self) -> Iterator[sqlite3.Connection]:
+		conn = self._open_current() or self._refresh()
+		try:
+			yield conn
+		finally:
+			conn.close()
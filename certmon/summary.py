@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import threading
+from datetime import date
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+def summarize(bucket_counts: Dict[str, int]) -> Dict[str, int]:
+	# 分桶计数转为累计口径：7 天内 ⊂ 30 天内 ⊂ 90 天内
+	d7 = bucket_counts.get("within_7", 0)
+	d30 = d7 + bucket_counts.get("within_30", 0)
+	d90 = d30 + bucket_counts.get("within_90", 0)
+	return {
+		"expired": bucket_counts.get("expired", 0),
+		"within_7_days": d7,
+		"within_30_days": d30,
+		"within_90_days": d90,
+	}
+
+
+def merge_bucket_counts(parts: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+	merged: Dict[str, int] = {}
+	for counts in parts.values():
+		for bucket, n in counts.items():
+			merged[bucket] = merged.get(bucket, 0) + n
+	return merged
+
+
+class SummaryCache:
+	# 每个 worker 一份：键为 (日期, 变更序号)，有写入（changes 表 seq 前进）或跨天时重新计算
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._key: Optional[Tuple[date, Hashable]] = None
+		self._value: Optional[Dict[str, int]] = None
+
+	def get(self, today: date, version: Hashable, compute: Callable[[], Dict[str, int]]) -> Dict[str, int]:
+		key = (today, version)
+		with self._lock:
+			if self._key == key and self._value is not None:
+				return self._value
+		value = compute()
+		with self._lock:
+			self._key = key
+			self._value = value
+		return value
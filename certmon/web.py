@@ -1,15 +1,206 @@
 from __future__ import annotations
 
+import signal
+import threading
+import time
 from datetime import date, datetime
 from pathlib import Path
-from typing import Tuple
+from typing import List, Tuple
 
-from flask import Flask, redirect, render_template, request, url_for, flash, session, jsonify
+from flask import Flask, Response, redirect, render_template, request, url_for, flash, session, jsonify, g
 
-from .config import load_config, try_load_config
+from .config import Config, ConfigHolder
 from .dateutil import add_months
-from .db import Database
+from .db import Certificate, Database
+from .forecast import FORECAST_MODES, build_forecast
 from .auth import hash_password, verify_password
+from .sharding import ShardedDatabase
+from .snapshot import ReadSnapshot
+from .summary import SummaryCache, merge_bucket_counts, summarize
+
+SEARCH_MAX_PER_PAGE = 100
+
+
+def _certificate_view(r: Certificate, today: date) -> dict:
+	is_permanent = int(r.valid_months) < 0 or (r.expires_on.year >= 9999)
+	if is_permanent:
+		expires_label = "永不过期"
+		days_left_label = "永不过期"
+	else:
+		delta_days = (r.expires_on - today).days
+		expires_label = r.expires_on.strftime('%Y-%m-%d')
+		days_left_label = f"{delta_days} 天"
+	return {
+		"id": r.id,
+		"name": r.name,
+		"email": r.email,
+		"acquired_on": r.acquired_on.strftime('%Y-%m-%d'),
+		"valid_months": r.valid_months,
+		"expires_on": r.expires_on.strftime('%Y-%m-%d'),
+		"expires_label": expires_label,
+		"days_left_label": days_left_label,
+		"last_reminded_on": (r.last_reminded_on.strftime('%Y-%m-%d') if r.last_reminded_on else '-'),
+	}
+
+
+FORECAST_MAX_DAYS = 366
+API_MAX_PAGE_SIZE = 200
+API_MAX_BATCH_ITEMS = 500
+# 变更订阅长轮询的最长等待与检查间隔（秒）
+CHANGES_MAX_WAIT = 25.0
+CHANGES_POLL_INTERVAL = 0.5
+
+
+def _certificate_json(r: Certificate) -> dict:
+	return {
+		"id": r.id,
+		"name": r.name,
+		"email": r.email,
+		"acquired_on": r.acquired_on.strftime("%Y-%m-%d"),
+		"valid_months": r.valid_months,
+		"expires_on": r.expires_on.strftime("%Y-%m-%d"),
+		"notes": r.notes,
+		"last_reminded_on": (r.last_reminded_on.strftime("%Y-%m-%d") if r.last_reminded_on else None),
+		"created_at": r.created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+		"updated_at": r.updated_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+	}
+
+
+def _compute_expiry(acquired_on: date, valid_months: int) -> date:
+	if valid_months < 0:
+		# 永久：使用超远未来作为到期占位，避免进入提醒窗口
+		return date(9999, 12, 31)
+	return add_months(acquired_on, valid_months)
+
+
+def _parse_certificate_payload(data: dict, base: Certificate | None = None) -> Tuple[str, str, date, int, date, str | None]:
+	# 创建时 base 为 None；PATCH 时未提供的字段沿用 base。出错抛 ValueError
+	if not isinstance(data, dict):
+		raise ValueError("item must be an object")
+
+	def text(key: str, current: str | None) -> str | None:
+		if key not in data:
+			return current
+		value = data[key]
+		if value is None:
+			return None
+		if not isinstance(value, str):
+			raise ValueError(f"{key} must be a string")
+		return value.strip()
+
+	def day(key: str, current: date | None) -> date | None:
+		if key not in data:
+			return current
+		try:
+			return datetime.strptime(str(data[key]), "%Y-%m-%d").date()
+		except ValueError:
+			raise ValueError(f"{key} must be YYYY-MM-DD") from None
+
+	name = text("name", base.name if base else None)
+	email = text("email", base.email if base else None)
+	notes = text("notes", base.notes if base else None)
+	if not name or not email:
+		raise ValueError("name and email required")
+	acquired_on = day("acquired_on", base.acquired_on if base else None)
+	if "expires_on" in data:
+		# 直接指定到期日（与 CLI --expires 一致，valid_months 记为 0）
+		expires_on = day("expires_on", None)
+		return name, email, acquired_on or expires_on, 0, expires_on, notes
+	if "valid_months" in data:
+		raw = data["valid_months"]
+		if raw == "permanent":
+			valid_months = -1
+		elif isinstance(raw, int) and not isinstance(raw, bool) and (raw > 0 or raw == -1):
+			valid_months = raw
+		else:
+			raise ValueError("valid_months must be a positive integer, -1 or 'permanent'")
+	elif base is not None:
+		valid_months = base.valid_months
+	else:
+		raise ValueError("valid_months or expires_on required")
+	if acquired_on is None:
+		raise ValueError("acquired_on required")
+	if base is not None and valid_months == 0:
+		# 直接指定到期日的记录只改了其它字段时，保持原到期日
+		return name, email, acquired_on, 0, base.expires_on, notes
+	return name, email, acquired_on, valid_months, _compute_expiry(acquired_on, valid_months), notes
+
+
+class _Runtime:
+	# 由某个版本的配置派生出的全部组件（数据库路径、分片、内存快照、汇总缓存）
+	def __init__(self, config: Config | None, version: int, base_dir: Path) -> None:
+		self.config = config
+		self.version = version
+
+		def resolve_db_path(raw: str) -> str:
+			# 数据库路径：相对路径按项目根目录解析，确保稳定
+			resolved = Path(raw)
+			if not resolved.is_absolute():
+				resolved = base_dir / resolved
+			return resolved.as_posix()
+
+		# 分片：用户与 SMTP 设置存放在默认分片，证书写入所选分片
+		self.shard_paths = {name: resolve_db_path(p) for name, p in config.app.shards.items()} if config else {}
+		if self.shard_paths:
+			self.default_shard = config.app.default_shard or next(iter(self.shard_paths))
+			self.db_path = self.shard_paths[self.default_shard]
+		else:
+			self.default_shard = None
+			self.db_path = resolve_db_path(config.app.database_path if config else "data/certmon.db")
+
+		# 可选：只读请求走本 worker 的内存快照
+		use_snapshot = bool(config and config.app.read_snapshot)
+		self.shard_snapshots = {name: ReadSnapshot(p) for name, p in self.shard_paths.items()} if use_snapshot else {}
+		if not use_snapshot:
+			self.snapshot = None
+		elif self.shard_paths:
+			self.snapshot = self.shard_snapshots.get(self.default_shard)
+		else:
+			self.snapshot = ReadSnapshot(self.db_path)
+		self.summary_cache = SummaryCache()
+
+	@property
+	def all_paths(self) -> List[str]:
+		return list(self.shard_paths.values()) if self.shard_paths else [self.db_path]
+
+	def read_db(self) -> Database:
+		return Database(self.db_path, snapshot=self.snapshot)
+
+	def read_sharded(self) -> ShardedDatabase:
+		return ShardedDatabase(
+			{name: Database(p, snapshot=self.shard_snapshots.get(name)) for name, p in self.shard_paths.items()},
+			self.default_shard,
+		)
+
+	def shard_db_path(self, name: str | None) -> str | None:
+		if not self.shard_paths:
+			return self.db_path
+		return self.shard_paths.get(name or self.default_shard)
+
+	def read_shard(self, name: str | None) -> Database | None:
+		if not self.shard_paths:
+			return self.read_db()
+		key = name or self.default_shard
+		if key not in self.shard_paths:
+			return None
+		return Database(self.shard_paths[key], snapshot=self.shard_snapshots.get(key))
+
+
+def _build_runtime(config: Config | None, version: int, base_dir: Path, previous: _Runtime | None) -> _Runtime:
+	rt = _Runtime(config, version, base_dir)
+	known = set(previous.all_paths) if previous is not None else set()
+	new_paths = [p for p in rt.all_paths if p not in known]
+	for path in new_paths:
+		Database(path).initialize_schema()
+	# 默认管理员：shanks / Huawei12#$ （仅在用户不存在时创建；热加载时只检查新出现的数据库）
+	if rt.db_path in new_paths:
+		try:
+			if not Database(rt.db_path).get_user_by_username("shanks"):
+				pwd_hex, salt_hex = hash_password("Huawei12#$")
+				Database(rt.db_path).create_user("shanks", pwd_hex, salt_hex, True)
+		except Exception:
+			pass
+	return rt
 
 
 def create_app(config_path: str = "/etc/certmon/config.json") -> Flask:
@@ -19,64 +210,312 @@ def create_app(config_path: str = "/etc/certmon/config.json") -> Flask:
 	conf_path = Path(config_path)
 	if not conf_path.is_absolute():
 		conf_path = base_dir / conf_path
-	config = try_load_config(conf_path.as_posix())
-
-	db_path = (config.app.database_path if config else "data/certmon.db")
-	# 数据库路径：相对路径按项目根目录解析，确保稳定
-	resolved = Path(db_path)
-	if not resolved.is_absolute():
-		resolved = base_dir / resolved
-	db_path = resolved.as_posix()
-
-	db = Database(db_path)
-	db.initialize_schema()
-	# 默认管理员：shanks / Huawei12#$ （仅在用户不存在时创建）
-	try:
-		if not Database(db_path).get_user_by_username("shanks"):
-			pwd_hex, salt_hex = hash_password("Huawei12#$")
-			Database(db_path).create_user("shanks", pwd_hex, salt_hex, True)
-	except Exception:
-		pass
+	holder = ConfigHolder(conf_path.as_posix())
+	runtime_lock = threading.Lock()
+	current = {"rt": _build_runtime(holder.config, holder.version, base_dir, None)}
+
+	def current_runtime() -> _Runtime:
+		# 配置版本变化时重建运行时组件并整体替换；进行中的请求继续使用各自取到的旧运行时
+		rt = current["rt"]
+		if holder.current() is not None and holder.version != rt.version:
+			with runtime_lock:
+				rt = current["rt"]
+				if holder.version != rt.version:
+					rt = _build_runtime(holder.config, holder.version, base_dir, current["rt"])
+					current["rt"] = rt
+		return rt
+
+	# 热加载触发方式之二：SIGHUP（gunicorn 下由 scripts/certmon.sh reload-config 发给各 worker）
+	if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+		try:
+			signal.signal(signal.SIGHUP, lambda signum, frame: holder.request_reload())
+		except ValueError:
+			pass
+
+	def read_db() -> Database:
+		return g.rt.read_db()
+
+	def read_sharded() -> ShardedDatabase:
+		return g.rt.read_sharded()
+
+	def shard_db_path(name: str | None) -> str | None:
+		return g.rt.shard_db_path(name)
+
+	def read_shard(name: str | None) -> Database | None:
+		return g.rt.read_shard(name)
 
 	app = Flask(__name__)
 	app.secret_key = "change-this-secret-key"
+	# 限制请求体大小，批量接口的条数另由 API_MAX_BATCH_ITEMS 约束
+	app.config["MAX_CONTENT_LENGTH"] = 2 * 1024 * 1024
+
+	@app.before_request
+	def _bind_runtime():
+		g.rt = current_runtime()
 
 	# 全局登录校验：未登录则重定向到 /login（放行登录与静态资源）
 	@app.before_request
 	def _require_login():
 		from flask import request
-		allow_endpoints = {"login", "do_login", "static"}
+		allow_endpoints = {"login", "do_login", "static", "metrics"}
 		if request.endpoint in allow_endpoints:
 			return None
 		if not session.get("uid"):
+			if request.path.startswith("/api/v1/"):
+				return jsonify({"error": "unauthorized"}), 401
 			return redirect(url_for("login"))
 
 	@app.get("/")
 	def index():
 		# 受全局 before_request 保护
-		records = Database(db_path).list_certificates()
 		today = date.today()
-		vm = []
-		for r in records:
-			is_permanent = int(r.valid_months) < 0 or (r.expires_on.year >= 9999)
-			if is_permanent:
-				expires_label = "永不过期"
-				days_left_label = "永不过期"
-			else:
-				delta_days = (r.expires_on - today).days
-				expires_label = r.expires_on.strftime('%Y-%m-%d')
-				days_left_label = f"{delta_days} 天"
-			vm.append({
-				"id": r.id,
-				"name": r.name,
-				"email": r.email,
-				"acquired_on": r.acquired_on.strftime('%Y-%m-%d'),
-				"valid_months": r.valid_months,
-				"expires_label": expires_label,
-				"days_left_label": days_left_label,
-				"last_reminded_on": (r.last_reminded_on.strftime('%Y-%m-%d') if r.last_reminded_on else '-'),
-			})
-		return render_template("index.html", records=vm)
+		rt = g.rt
+		if rt.shard_paths:
+			vm = []
+			for shard_name, r in read_sharded().list_certificates():
+				item = _certificate_view(r, today)
+				item["shard"] = shard_name
+				vm.append(item)
+		else:
+			vm = [_certificate_view(r, today) for r in read_db().list_certificates()]
+		change_seq = read_db().latest_change_seq()
+		return render_template("index.html", records=vm, shards=list(rt.shard_paths), default_shard=rt.default_shard, change_seq=change_seq)
+
+	@app.get("/api/certificates/search")
+	def api_search_certificates():
+		q = (request.args.get("q") or "").strip()
+		try:
+			page = max(1, int(request.args.get("page", 1)))
+			per_page = min(SEARCH_MAX_PER_PAGE, max(1, int(request.args.get("per_page", 20))))
+		except ValueError:
+			return jsonify({"error": "invalid page or per_page"}), 400
+		search_db = read_shard(request.args.get("shard"))
+		if search_db is None:
+			return jsonify({"error": "unknown shard"}), 400
+		records, total, truncated = search_db.search_certificates(q, limit=per_page, offset=(page - 1) * per_page)
+		today = date.today()
+		return jsonify({
+			"q": q,
+			"page": page,
+			"per_page": per_page,
+			"total": total,
+			"truncated": truncated,
+			"items": [_certificate_view(r, today) for r in records],
+		})
+
+	# 归档记录只读查询
+	@app.get("/api/archive")
+	def api_archive():
+		archive_db = read_shard(request.args.get("shard"))
+		if archive_db is None:
+			return jsonify({"error": "unknown shard"}), 400
+		today = date.today()
+		items = []
+		for r in archive_db.list_archived_certificates():
+			item = _certificate_view(r, today)
+			item["archived_at"] = r.archived_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+			items.append(item)
+		return jsonify({"total": len(items), "items": items})
+
+	# 到期分桶汇总：按 (日期, 各库变更序号) 缓存，轮询时只需一次 MAX(seq) 查询
+	@app.get("/api/summary")
+	def api_summary():
+		today = date.today()
+		rt = g.rt
+		if rt.shard_paths:
+			sharded = read_sharded()
+			version = tuple(sorted(sharded.fan_out(lambda d: d.latest_change_seq()).items()))
+			compute = lambda: summarize(merge_bucket_counts(sharded.fan_out(lambda d: d.expiry_bucket_counts(today))))
+		else:
+			db_obj = read_db()
+			version = db_obj.latest_change_seq()
+			compute = lambda: summarize(db_obj.expiry_bucket_counts(today))
+		result = dict(rt.summary_cache.get(today, version, compute))
+		result["date"] = today.strftime("%Y-%m-%d")
+		return jsonify(result)
+
+	@app.get("/api/forecast")
+	def api_forecast():
+		config = g.rt.config
+		if config is None:
+			return jsonify({"error": "config not loaded"}), 503
+		try:
+			days = min(FORECAST_MAX_DAYS, max(1, int(request.args.get("days", 90))))
+		except ValueError:
+			return jsonify({"error": "invalid days"}), 400
+		mode = request.args.get("mode", "certificate")
+		if mode not in FORECAST_MODES:
+			return jsonify({"error": "invalid mode"}), 400
+		source = read_sharded() if g.rt.shard_paths else read_db()
+		fc = build_forecast(config, source, date.today(), days, mode=mode)
+		peak = fc.peak
+		return jsonify({
+			"days": fc.days,
+			"mode": fc.mode,
+			"quota": fc.quota,
+			"total": sum(fc.count(d) for d in fc.daily),
+			"peak": ({"date": peak.day.strftime("%Y-%m-%d"), "emails": fc.count(peak)} if peak else None),
+			"daily": [
+				{"date": d.day.strftime("%Y-%m-%d"), "emails": d.emails, "digest_emails": d.digest_emails, "over_quota": d.over_quota}
+				for d in fc.daily
+			],
+			"recipients": [{"email": r.email, "emails": r.emails, "digest_emails": r.digest_emails} for r in fc.recipients],
+		})
+
+	# 运行指标（Prometheus 文本格式，无需登录）：含当前生效的配置版本
+	@app.get("/metrics")
+	def metrics():
+		rt = g.rt
+		lines = [
+			"# HELP certmon_config_version Active configuration version (increments on each successful reload).",
+			"# TYPE certmon_config_version gauge",
+			f"certmon_config_version {rt.version}",
+			"# HELP certmon_config_loaded_timestamp_seconds Unix time the active configuration was loaded.",
+			"# TYPE certmon_config_loaded_timestamp_seconds gauge",
+			f"certmon_config_loaded_timestamp_seconds {holder.loaded_at:.3f}",
+			"# HELP certmon_config_reload_errors_total Failed configuration reload attempts.",
+			"# TYPE certmon_config_reload_errors_total counter",
+			f"certmon_config_reload_errors_total {holder.reload_errors}",
+		]
+		return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+	# 增量变更：?since=<seq>&wait=<秒>，无新变更时最多等待 wait 秒（长轮询）
+	@app.get("/api/changes")
+	def api_changes():
+		feed_db = read_shard(request.args.get("shard"))
+		if feed_db is None:
+			return jsonify({"error": "unknown shard"}), 400
+		try:
+			since = max(0, int(request.args.get("since", 0)))
+			wait = min(CHANGES_MAX_WAIT, max(0.0, float(request.args.get("wait", 0))))
+		except ValueError:
+			return jsonify({"error": "invalid since or wait"}), 400
+		deadline = time.monotonic() + wait
+		while feed_db.latest_change_seq() <= since and time.monotonic() < deadline:
+			time.sleep(CHANGES_POLL_INTERVAL)
+		changes, last_seq, reset = feed_db.list_changes(since)
+		today = date.today()
+		return jsonify({
+			"since": since,
+			"last_seq": last_seq,
+			"reset": reset,
+			"changes": [
+				{
+					"seq": ch.seq,
+					"op": ch.op,
+					"id": ch.certificate_id,
+					"item": (_certificate_view(ch.certificate, today) if ch.certificate is not None else None),
+				}
+				for ch in changes
+			],
+		})
+
+	# ---- JSON API v1：证书增删改查与批量操作（可用 ?shard= 指定分片）----
+	def api_db() -> Database | None:
+		path = shard_db_path(request.args.get("shard"))
+		return Database(path) if path is not None else None
+
+	def api_items(key: str):
+		data = request.get_json(silent=True)
+		if not isinstance(data, dict) or not isinstance(data.get(key), list):
+			return None, (jsonify({"error": f"body must be an object with a '{key}' list"}), 400)
+		items = data[key]
+		if not items:
+			return None, (jsonify({"error": f"'{key}' must not be empty"}), 400)
+		if len(items) > API_MAX_BATCH_ITEMS:
+			return None, (jsonify({"error": f"at most {API_MAX_BATCH_ITEMS} items per request"}), 413)
+		return items, None
+
+	@app.get("/api/v1/certificates")
+	def api_v1_list_certificates():
+		db_obj = read_shard(request.args.get("shard"))
+		if db_obj is None:
+			return jsonify({"error": "unknown shard"}), 400
+		try:
+			cursor = int(request.args.get("cursor", 0))
+			limit = min(API_MAX_PAGE_SIZE, max(1, int(request.args.get("limit", 50))))
+		except ValueError:
+			return jsonify({"error": "invalid cursor or limit"}), 400
+		# 多取一条判断是否还有下一页
+		records = db_obj.list_certificates_page(cursor, limit + 1)
+		page = records[:limit]
+		next_cursor = page[-1].id if len(records) > limit else None
+		return jsonify({"items": [_certificate_json(r) for r in page], "next_cursor": next_cursor})
+
+	@app.get("/api/v1/certificates/<int:cid>")
+	def api_v1_get_certificate(cid: int):
+		db_obj = read_shard(request.args.get("shard"))
+		if db_obj is None:
+			return jsonify({"error": "unknown shard"}), 400
+		cert = db_obj.get_certificate(cid)
+		if cert is None:
+			return jsonify({"error": "not found"}), 404
+		return jsonify(_certificate_json(cert))
+
+	@app.post("/api/v1/certificates")
+	def api_v1_create_certificate():
+		db_obj = api_db()
+		if db_obj is None:
+			return jsonify({"error": "unknown shard"}), 400
+		try:
+			values = _parse_certificate_payload(request.get_json(silent=True))
+		except ValueError as e:
+			return jsonify({"error": str(e)}), 400
+		new_id = db_obj.add_certificate(*values)
+		return jsonify(_certificate_json(db_obj.get_certificate(new_id))), 201
+
+	@app.patch("/api/v1/certificates/<int:cid>")
+	def api_v1_update_certificate(cid: int):
+		db_obj = api_db()
+		if db_obj is None:
+			return jsonify({"error": "unknown shard"}), 400
+		current = db_obj.get_certificate(cid)
+		if current is None:
+			return jsonify({"error": "not found"}), 404
+		try:
+			values = _parse_certificate_payload(request.get_json(silent=True), base=current)
+		except ValueError as e:
+			return jsonify({"error": str(e)}), 400
+		db_obj.update_certificate(cid, *values)
+		return jsonify(_certificate_json(db_obj.get_certificate(cid)))
+
+	@app.post("/api/v1/certificates/batch")
+	def api_v1_batch_create_certificates():
+		db_obj = api_db()
+		if db_obj is None:
+			return jsonify({"error": "unknown shard"}), 400
+		items, error = api_items("items")
+		if error:
+			return error
+		# 先逐条校验；全部合法才在一个事务中写入
+		results = []
+		valid = []
+		for index, item in enumerate(items):
+			try:
+				valid.append(_parse_certificate_payload(item))
+				results.append({"index": index, "ok": True})
+			except ValueError as e:
+				results.append({"index": index, "ok": False, "error": str(e)})
+		if len(valid) != len(items):
+			return jsonify({"created": 0, "results": results}), 400
+		new_ids = db_obj.add_certificates(valid)
+		for result, new_id in zip(results, new_ids):
+			result["id"] = new_id
+		return jsonify({"created": len(new_ids), "results": results}), 201
+
+	@app.post("/api/v1/certificates/batch-delete")
+	def api_v1_batch_delete_certificates():
+		db_obj = api_db()
+		if db_obj is None:
+			return jsonify({"error": "unknown shard"}), 400
+		ids, error = api_items("ids")
+		if error:
+			return error
+		if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+			return jsonify({"error": "ids must be integers"}), 400
+		deleted = db_obj.remove_certificates(ids)
+		results = [{"id": i, "deleted": ok} for i, ok in zip(ids, deleted)]
+		return jsonify({"deleted": sum(1 for ok in deleted if ok), "results": results})
 
 	@app.post("/add")
 	def add():
@@ -104,12 +543,12 @@ def create_app(config_path: str = "/etc/certmon/config.json") -> Flask:
 			flash("日期格式应为 YYYY-MM-DD，且有效月数为正整数或选择永久", "error")
 			return redirect(url_for("index"))
 
-		if valid_months < 0:
-			# 永久：使用超远未来作为到期占位，避免进入提醒窗口
-			expires_on = date(9999, 12, 31)
-		else:
-			expires_on = add_months(acquired_on, valid_months)
-		Database(db_path).add_certificate(name, email, acquired_on, valid_months, expires_on, notes)
+		expires_on = _compute_expiry(acquired_on, valid_months)
+		target_path = shard_db_path(request.form.get("shard"))
+		if target_path is None:
+			flash("未知分片", "error")
+			return redirect(url_for("index"))
+		Database(target_path).add_certificate(name, email, acquired_on, valid_months, expires_on, notes)
 		flash("已新增证书", "success")
 		return redirect(url_for("index"))
 
@@ -117,7 +556,7 @@ def create_app(config_path: str = "/etc/certmon/config.json") -> Flask:
 	def settings_page():
 		if not session.get("uid"):
 			return redirect(url_for("login"))
-		settings = Database(db_path).get_smtp_settings()
+		settings = Database(g.rt.db_path).get_smtp_settings()
 		return render_template("settings.html", settings=settings)
 
 	@app.post("/settings")
@@ -137,7 +576,7 @@ def create_app(config_path: str = "/etc/certmon/config.json") -> Flask:
 			flash("参数不合法", "error")
 			return redirect(url_for("settings_page"))
 		try:
-			Database(db_path).upsert_smtp_settings(host, port_val, username, password, use_tls_val, from_email)
+			Database(g.rt.db_path).upsert_smtp_settings(host, port_val, username, password, use_tls_val, from_email)
 			flash("SMTP 设置已保存", "success")
 		except Exception as e:
 			flash(f"保存失败: {e}", "error")
@@ -149,7 +588,8 @@ def create_app(config_path: str = "/etc/certmon/config.json") -> Flask:
 			return redirect(url_for("login"))
 		# Flask 2.x 传参兼容处理
 		target_id = cid if cid is not None else cert_id
-		ok = Database(db_path).remove_certificate(int(target_id))
+		target_path = shard_db_path(request.form.get("shard"))
+		ok = target_path is not None and Database(target_path).remove_certificate(int(target_id))
 		flash("已删除" if ok else "未找到该记录", "success" if ok else "error")
 		return redirect(url_for("index"))
 
@@ -161,7 +601,7 @@ def create_app(config_path: str = "/etc/certmon/config.json") -> Flask:
 	def do_login():
 		username = (request.form.get("username") or "").strip()
 		password = (request.form.get("password") or "")
-		db_obj = Database(db_path)
+		db_obj = Database(g.rt.db_path)
 		user = db_obj.get_user_by_username(username)
 		if user and verify_password(password, user.password_hex, user.salt_hex):
 			session["uid"] = user.id
@@ -186,10 +626,10 @@ def create_app(config_path: str = "/etc/certmon/config.json") -> Flask:
 		is_admin = bool(data.get("is_admin", False))
 		if not username or not password:
 			return jsonify({"error": "username and password required"}), 400
-		if Database(db_path).get_user_by_username(username):
+		if Database(g.rt.db_path).get_user_by_username(username):
 			return jsonify({"error": "user exists"}), 409
 		pwd_hex, salt_hex = hash_password(password)
-		uid = Database(db_path).create_user(username, pwd_hex, salt_hex, is_admin)
+		uid = Database(g.rt.db_path).create_user(username, pwd_hex, salt_hex, is_admin)
 		return jsonify({"id": uid, "username": username, "is_admin": is_admin}), 201
 
 	return app
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+
+# 仅解析提醒所需字段（subject CN、notBefore、notAfter），不依赖 cryptography，兼容 CentOS 7 自带 Python
+_PEM_RE = re.compile(
+	rb"-----BEGIN (?:TRUSTED |X509 )?CERTIFICATE-----(.+?)-----END (?:TRUSTED |X509 )?CERTIFICATE-----",
+	re.DOTALL,
+)
+
+_TAG_SEQUENCE = 0x30
+_TAG_SET = 0x31
+_TAG_OID = 0x06
+_TAG_UTCTIME = 0x17
+_TAG_GENERALIZEDTIME = 0x18
+_TAG_VERSION = 0xA0
+
+_OID_COMMON_NAME = b"\x55\x04\x03"
+_OID_ORGANIZATION = b"\x55\x04\x0a"
+
+
+@dataclass
+class X509Info:
+	subject: str
+	not_before: date
+	not_after: date
+	# DER 编码的 SHA-256（十六进制），用于识别不同文件中的同一张证书
+	fingerprint: str
+
+
+class X509ParseError(ValueError):
+	pass
+
+
+def _read_tlv(data: bytes, offset: int) -> Tuple[int, int, int]:
+	# 返回 (tag, 内容起点, 内容终点)
+	if offset + 2 > len(data):
+		raise X509ParseError("DER 数据截断")
+	tag = data[offset]
+	length = data[offset + 1]
+	pos = offset + 2
+	if length & 0x80:
+		num = length & 0x7F
+		if num == 0 or num > 4 or pos + num > len(data):
+			raise X509ParseError("不支持的 DER 长度编码")
+		length = int.from_bytes(data[pos:pos + num], "big")
+		pos += num
+	end = pos + length
+	if end > len(data):
+		raise X509ParseError("DER 数据截断")
+	return tag, pos, end
+
+
+def _children(data: bytes, start: int, end: int) -> List[Tuple[int, int, int]]:
+	items = []
+	pos = start
+	while pos < end:
+		tag, s, e = _read_tlv(data, pos)
+		items.append((tag, s, e))
+		pos = e
+	return items
+
+
+def _decode_string(tag: int, raw: bytes) -> str:
+	if tag == 0x1E:  # BMPString
+		return raw.decode("utf-16-be", errors="replace")
+	if tag == 0x1C:  # UniversalString
+		return raw.decode("utf-32-be", errors="replace")
+	if tag == 0x0C:  # UTF8String
+		return raw.decode("utf-8", errors="replace")
+	return raw.decode("latin-1")
+
+
+def _decode_time(tag: int, raw: bytes) -> date:
+	text = raw.decode("ascii")
+	if tag == _TAG_UTCTIME:
+		year = int(text[0:2])
+		year += 1900 if year >= 50 else 2000
+		return date(year, int(text[2:4]), int(text[4:6]))
+	if tag == _TAG_GENERALIZEDTIME:
+		return datetime.strptime(text[0:8], "%Y%m%d").date()
+	raise X509ParseError("未知的时间编码")
+
+
+def _name_attribute(data: bytes, start: int, end: int, oid: bytes) -> Optional[str]:
+	# Name ::= SEQUENCE OF SET OF SEQUENCE { OID, value }，取最后一个匹配项（最具体）
+	found: Optional[str] = None
+	for set_tag, set_s, set_e in _children(data, start, end):
+		if set_tag != _TAG_SET:
+			continue
+		for _, atv_s, atv_e in _children(data, set_s, set_e):
+			parts = _children(data, atv_s, atv_e)
+			if len(parts) < 2 or parts[0][0] != _TAG_OID:
+				continue
+			if data[parts[0][1]:parts[0][2]] == oid:
+				val_tag, val_s, val_e = parts[1]
+				found = _decode_string(val_tag, data[val_s:val_e])
+	return found
+
+
+def parse_der(der: bytes) -> X509Info:
+	try:
+		tag, cert_s, cert_e = _read_tlv(der, 0)
+		if tag != _TAG_SEQUENCE:
+			raise X509ParseError("不是 X.509 证书")
+		tag, tbs_s, tbs_e = _read_tlv(der, cert_s)
+		if tag != _TAG_SEQUENCE:
+			raise X509ParseError("不是 X.509 证书")
+		fields = _children(der, tbs_s, tbs_e)
+		if fields and fields[0][0] == _TAG_VERSION:
+			fields = fields[1:]
+		# serialNumber, signature, issuer, validity, subject
+		if len(fields) < 5:
+			raise X509ParseError("TBSCertificate 字段不完整")
+		_, val_s, val_e = fields[3]
+		times = _children(der, val_s, val_e)
+		if len(times) != 2:
+			raise X509ParseError("Validity 字段不完整")
+		not_before = _decode_time(times[0][0], der[times[0][1]:times[0][2]])
+		not_after = _decode_time(times[1][0], der[times[1][1]:times[1][2]])
+		_, subj_s, subj_e = fields[4]
+		subject = (
+			_name_attribute(der, subj_s, subj_e, _OID_COMMON_NAME)
+			or _name_attribute(der, subj_s, subj_e, _OID_ORGANIZATION)
+			or ""
+		)
+	except X509ParseError:
+		raise
+	except (ValueError, IndexError, UnicodeDecodeError) as e:
+		raise X509ParseError(f"证书解析失败: {e}") from e
+	return X509Info(
+		subject=subject,
+		not_before=not_before,
+		not_after=not_after,
+		fingerprint=hashlib.sha256(der[:cert_e]).hexdigest(),
+	)
+
+
+def parse_certificate_bytes(data: bytes) -> X509Info:
+	# 自动识别 PEM / DER；PEM 含证书链时取第一张（叶子证书）
+	m = _PEM_RE.search(data)
+	if m:
+		try:
+			der = base64.b64decode(b"".join(m.group(1).split()), validate=True)
+		except ValueError as e:
+			# binascii.Error 是 ValueError 的子类：PEM 被截断或内容损坏
+			raise X509ParseError(f"PEM 解码失败: {e}") from e
+		return parse_der(der)
+	return parse_der(data)
@@ -3,7 +3,7 @@ set -euo pipefail
 
 # CertMon app start/stop script for Linux (CentOS 7.9 etc.)
 # Usage:
-#   ./scripts/certmon.sh start|stop|restart|reload|status|tail
+#   ./scripts/certmon.sh start|stop|restart|reload|reload-config|status|tail
 
 APP_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")"/.. && pwd)"
 PYTHON="${PYTHON:-/usr/bin/python3}"
@@ -147,6 +147,25 @@ reload_() {
   kill -HUP "$pid"
 }
 
+reload_config() {
+  # 只让各 worker 重新读取 config.json（SIGHUP 发给 worker，不重启进程）
+  if ! is_running; then
+    echo "[certmon] not running"
+    return 1
+  fi
+  local pid workers
+  pid="$(cat "$PID_FILE")"
+  workers="$(pgrep -P "$pid" 2>/dev/null || true)"
+  if [[ -z "$workers" ]]; then
+    echo "[certmon] no workers found under pid $pid"
+    return 1
+  fi
+  echo "[certmon] reloading config in workers: $(echo $workers | tr '\n' ' ')"
+  for w in $workers; do
+    kill -HUP "$w" 2>/dev/null || true
+  done
+}
+
 status() {
   if is_running; then
     echo "[certmon] running (pid $(cat "$PID_FILE"))"
@@ -165,7 +184,7 @@ tail_logs() {
 
 usage() {
   cat <<USAGE
-Usage: $(basename "$0") <start|stop|restart|reload|status|tail>
+Usage: $(basename "$0") <start|stop|restart|reload|reload-config|status|tail>
 
 Env vars (optional):
   PYTHON=/usr/bin/python3
@@ -181,6 +200,7 @@ case "${1:-}" in
   stop) stop ;;
   restart) stop; start ;;
   reload) reload_ ;;
+  reload-config) reload_config ;;
   status) status ;;
   tail) tail_logs ;;
   *) usage; exit 1 ;;
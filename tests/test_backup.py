@@ -0,0 +1,51 @@
+import errno
+import sqlite3
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+from unittest import mock
+
+from certmon import backup
+from certmon.backup import backup_database
+from certmon.db import Database
+
+
+class BackupPublishTest(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		root = Path(self._tmp.name)
+		self.source = root / "certmon.db"
+		self.dest = root / "backups"
+		db = Database(self.source.as_posix())
+		db.initialize_schema()
+		db.add_certificate("a.example.com", "ops@example.com", date(2026, 1, 1), 12, date(2027, 1, 1), None)
+
+	def tearDown(self):
+		self._tmp.cleanup()
+
+	def _backup_twice(self):
+		# 固定时间戳，让第二份备份与第一份同名冲突
+		fixed = mock.Mock(wraps=datetime)
+		fixed.now.return_value = datetime(2026, 10, 19, 12, 0, 0)
+		with mock.patch.object(backup, "datetime", fixed):
+			return [Path(backup_database(self.source.as_posix(), self.dest.as_posix(), sleep_seconds=0).path) for _ in range(2)]
+
+	def _assert_published(self, paths):
+		self.assertEqual([p.name for p in paths], ["certmon-20261019-120000.db", "certmon-20261019-120000-1.db"])
+		for p in paths:
+			with sqlite3.connect(p.as_posix()) as conn:
+				self.assertEqual(conn.execute("SELECT COUNT(*) FROM certificates").fetchone()[0], 1)
+		self.assertEqual(sorted(p.name for p in self.dest.iterdir()), sorted(p.name for p in paths))
+
+	def test_hard_link(self):
+		self._assert_published(self._backup_twice())
+
+	def test_falls_back_without_hard_links(self):
+		# CIFS/FUSE 上 link() 返回 EPERM/ENOTSUP 等错误
+		with mock.patch.object(backup.os, "link", side_effect=OSError(errno.EPERM, "Operation not permitted")):
+			self._assert_published(self._backup_twice())
+
+
+if __name__ == "__main__":
+	unittest.main()
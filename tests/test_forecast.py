@@ -0,0 +1,55 @@
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+from certmon.config import AppConfig, Config, SMTPConfig
+from certmon.db import Database
+from certmon.forecast import build_forecast
+from certmon.sharding import ShardedDatabase
+
+
+class ShardedForecastTest(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		root = Path(self._tmp.name)
+		self.shards = {}
+		for name in ("a", "b"):
+			self.shards[name] = Database(str(root / f"{name}.db"))
+			self.shards[name].initialize_schema()
+		self.single = Database(str(root / "single.db"))
+		self.single.initialize_schema()
+		self.sharded = ShardedDatabase(self.shards)
+		self.start = date(2026, 1, 1)
+		smtp = SMTPConfig(host="localhost", port=25, username="u", password="p", use_tls=False, from_email="certmon@example.com")
+		self.config = Config(smtp=smtp, app=AppConfig(reminder_window_days=3, daily_send_quota=1))
+
+	def tearDown(self):
+		self._tmp.cleanup()
+
+	def _add(self, shard, email, expires_in):
+		for db in (self.shards[shard], self.single):
+			db.add_certificate(f"{email}-{expires_in}", email, self.start, 12, self.start + timedelta(days=expires_in), None)
+
+	def test_merges_before_top_and_quota(self):
+		# x@x 在 a 分片 5 张、b 分片 3 张；y@y 只在 a 分片 5 张
+		for _ in range(5):
+			self._add("a", "x@x", 2)
+		for _ in range(3):
+			self._add("b", "x@x", 2)
+		for _ in range(5):
+			self._add("a", "y@y", 10)
+		for mode in ("certificate", "digest"):
+			with self.subTest(mode=mode):
+				fc = build_forecast(self.config, self.sharded, self.start, 14, mode=mode, top=1)
+				expected = build_forecast(self.config, self.single, self.start, 14, mode=mode, top=1)
+				self.assertEqual(fc.daily, expected.daily)
+				self.assertEqual(fc.recipients, expected.recipients)
+				self.assertEqual([(r.email, r.emails) for r in fc.recipients], [("x@x", 24)])
+				# 摘要模式下 x@x 每天只算一封，不因分布在两个分片而超额
+				if mode == "digest":
+					self.assertFalse(fc.daily[0].over_quota)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import socket
+import ssl
+import tempfile
+import threading
+import unittest
+from datetime import date
+from pathlib import Path
+
+from certmon.db import Database
+from certmon.prober import probe_all
+
+DATA = Path(__file__).resolve().parent / "data"
+
+
+class LoopbackTLSServer:
+	# 在后台线程的事件循环里运行 asyncio TLS 服务端，握手后立即关闭连接
+	def __init__(self):
+		self._loop = asyncio.new_event_loop()
+		self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+		self._server = None
+		self.port = 0
+
+	async def _start(self):
+		ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+		ctx.load_cert_chain(DATA / "leaf.pem", DATA / "leaf.key")
+
+		async def handle(reader, writer):
+			writer.close()
+
+		self._server = await asyncio.start_server(handle, "127.0.0.1", 0, ssl=ctx)
+		self.port = self._server.sockets[0].getsockname()[1]
+
+	def __enter__(self):
+		self._thread.start()
+		asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(10)
+		return self
+
+	def __exit__(self, *exc):
+		async def stop():
+			self._server.close()
+			await self._server.wait_closed()
+
+		asyncio.run_coroutine_threadsafe(stop(), self._loop).result(10)
+		self._loop.call_soon_threadsafe(self._loop.stop)
+		self._thread.join(10)
+		self._loop.close()
+
+
+def _unused_port():
+	with socket.socket() as s:
+		s.bind(("127.0.0.1", 0))
+		return s.getsockname()[1]
+
+
+class ProbeTest(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		self.db = Database(str(Path(self._tmp.name) / "certmon.db"))
+		self.db.initialize_schema()
+
+	def tearDown(self):
+		self._tmp.cleanup()
+
+	def _add_endpoint(self, port):
+		# 与 endpoint-add 一致：占位记录的到期日为 9999-12-31，探测后写回实际到期日
+		cid = self.db.add_certificate("127.0.0.1", "ops@example.com", date.today(), 0, date(9999, 12, 31), None)
+		return self.db.add_endpoint("127.0.0.1", port, "certmon-test.local", cid), cid
+
+	def test_probe_writes_back_expiry(self):
+		with LoopbackTLSServer() as server:
+			endpoint_id, cid = self._add_endpoint(server.port)
+			summary = probe_all(self.db, timeout=5.0)
+		self.assertEqual((summary.probed, summary.failed, summary.certificates_updated), (1, 0, 1))
+		cert = next(c for c in self.db.list_certificates() if c.id == cid)
+		self.assertEqual(cert.expires_on, date(2126, 9, 25))
+		self.assertEqual(cert.acquired_on, date(2026, 10, 19))
+		endpoint = next(ep for ep in self.db.list_endpoints() if ep.id == endpoint_id)
+		self.assertEqual(endpoint.last_expires_on, date(2126, 9, 25))
+		self.assertIsNone(endpoint.last_error)
+
+	def test_refused_connection_is_recorded(self):
+		endpoint_id, cid = self._add_endpoint(_unused_port())
+		summary = probe_all(self.db, timeout=5.0)
+		self.assertEqual((summary.probed, summary.failed, summary.certificates_updated), (1, 1, 0))
+		endpoint = next(ep for ep in self.db.list_endpoints() if ep.id == endpoint_id)
+		self.assertIsNotNone(endpoint.last_error)
+		self.assertIsNotNone(endpoint.last_probed_at)
+		cert = next(c for c in self.db.list_certificates() if c.id == cid)
+		self.assertEqual(cert.expires_on, date(9999, 12, 31))
+
+
+if __name__ == "__main__":
+	unittest.main()
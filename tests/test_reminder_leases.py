@@ -0,0 +1,82 @@
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+from certmon import logic
+from certmon.config import AppConfig, Config, SMTPConfig
+from certmon.db import Database
+from certmon.emailer import MailTransport
+
+
+class RecordingTransport(MailTransport):
+	# 记录每封邮件的收件证书名；delay 模拟慢速 SMTP
+	def __init__(self, log, lock, delay=0.0):
+		self._log = log
+		self._lock = lock
+		self._delay = delay
+
+	def send_batch(self, messages, before_send=None):
+		sent = 0
+		for i, msg in enumerate(messages):
+			if before_send is not None and not before_send(i):
+				break
+			time.sleep(self._delay)
+			with self._lock:
+				self._log.append(msg["Subject"])
+			sent += 1
+		return sent
+
+
+class ReminderLeaseTest(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		self.db = Database(str(Path(self._tmp.name) / "certmon.db"))
+		self.db.initialize_schema()
+		self.today = date.today()
+		self.sent = []
+		self.lock = threading.Lock()
+		self._make_transport = logic.make_transport
+
+	def tearDown(self):
+		logic.make_transport = self._make_transport
+		self._tmp.cleanup()
+
+	def _config(self, batch_size, lease_seconds):
+		smtp = SMTPConfig(host="localhost", port=25, username="u", password="p", use_tls=False, from_email="certmon@example.com")
+		app = AppConfig(reminder_window_days=10, reminder_batch_size=batch_size, reminder_lease_seconds=lease_seconds)
+		return Config(smtp=smtp, app=app)
+
+	def _add(self, count):
+		for i in range(count):
+			self.db.add_certificate(f"cert-{i}", "ops@example.com", self.today, 1, self.today + timedelta(days=i % 10), None)
+
+	def _run_workers(self, config, workers):
+		with ThreadPoolExecutor(workers) as pool:
+			futures = [pool.submit(logic.send_due_reminders, config, self.db, self.today) for _ in range(workers)]
+			return [f.result() for f in futures]
+
+	def test_concurrent_workers_send_each_certificate_once(self):
+		self._add(300)
+		logic.make_transport = lambda mail, smtp: RecordingTransport(self.sent, self.lock)
+		counts = self._run_workers(self._config(batch_size=7, lease_seconds=300), workers=8)
+		self.assertEqual(sum(counts), 300)
+		self.assertEqual(len(self.sent), 300)
+		self.assertEqual(len(set(self.sent)), 300)
+		self.assertEqual(logic.send_due_reminders(self._config(7, 300), self.db, self.today), 0)
+
+	def test_slow_batch_renews_lease_instead_of_resending(self):
+		# 每块 10 封、每封 0.1 秒，整块约 1 秒，远超 0.4 秒租约：不续期时其它进程会重新认领并重复发送
+		self._add(30)
+		logic.make_transport = lambda mail, smtp: RecordingTransport(self.sent, self.lock, delay=0.1)
+		counts = self._run_workers(self._config(batch_size=10, lease_seconds=0.4), workers=3)
+		self.assertEqual(sum(counts), 30)
+		self.assertEqual(len(self.sent), 30)
+		self.assertEqual(len(set(self.sent)), 30)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,123 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+import unittest
+from datetime import date
+from pathlib import Path
+
+from certmon.db import SEARCH_RESULT_LIMIT, Database
+
+WORDS = ["生产", "测试", "网关", "证书", "数据库", "支付", "订单", "内网", "外网", "负载均衡", "监控"]
+
+
+def _insert(db, rows):
+	# 直接批量写入，避免逐条提交；FTS 索引由触发器同步
+	now = "2026-01-01T00:00:00Z"
+	with db.connect() as conn:
+		cursor = conn.executemany(
+			"""
+			INSERT INTO certificates (name, email, acquired_on, valid_months, expires_on, notes, created_at, updated_at)
+			VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+			""",
+			[(name, email, str(acquired_on), months, str(expires_on), notes, now, now) for name, email, acquired_on, months, expires_on, notes in rows],
+		)
+		count = cursor.rowcount
+		last = conn.execute("SELECT MAX(id) FROM certificates").fetchone()[0]
+	return list(range(last - count + 1, last + 1))
+
+
+def _rows(count, seed=1):
+	rnd = random.Random(seed)
+	for i in range(count):
+		if i % 3:
+			name = f"{rnd.choice(['api', 'www', 'mail', 'db'])}{i}.Example{i % 50}.com"
+		else:
+			name = f"{rnd.choice(WORDS)}{rnd.choice(WORDS)}SSL证书{i}"
+		notes = "".join(rnd.sample(WORDS, 3)) + f" 编号{i}" if i % 2 else None
+		yield (name, f"ops{i % 300}@corp{i % 7}.cn", date(2026, 1, 1), 12, date(2027, i % 12 + 1, 1), notes)
+
+
+class SearchTest(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		self.db = Database(str(Path(self._tmp.name) / "certmon.db"))
+		self.db.initialize_schema()
+
+	def tearDown(self):
+		self._tmp.cleanup()
+
+	def _expected(self, text):
+		# 与 LIKE 子串匹配等价：每个关键词至少命中名称/邮箱/备注之一（不区分大小写）
+		terms = [t.lower() for t in text.split()]
+		ids = set()
+		for c in self.db.list_certificates():
+			fields = [c.name.lower(), c.email.lower(), (c.notes or "").lower()]
+			if all(any(t in f for f in fields) for t in terms):
+				ids.add(c.id)
+		return ids
+
+	def test_matches_like_semantics(self):
+		_insert(self.db, _rows(600))
+		for text in ["证", "证书", "网关", "负载均衡", "生产 网关", "example", "EXAMPLE7", "corp3", "ops12", "p", "ab", "编号1", "证书 corp3", "不存在"]:
+			with self.subTest(text=text):
+				records, total, truncated = self.db.search_certificates(text, limit=SEARCH_RESULT_LIMIT)
+				self.assertFalse(truncated)
+				self.assertEqual({r.id for r in records}, self._expected(text))
+				self.assertEqual(total, len(records))
+
+	def test_cjk_index_follows_updates_and_deletes(self):
+		cid = self.db.add_certificate("内网网关", "ops@example.com", date(2026, 1, 1), 12, date(2027, 1, 1), None)
+		self.assertEqual([r.id for r in self.db.search_certificates("网")[0]], [cid])
+		with self.db.connect() as conn:
+			conn.execute("UPDATE certificates SET name = ?, notes = ? WHERE id = ?", ("外部接口", "支付", cid))
+		self.assertEqual(self.db.search_certificates("网")[1], 0)
+		self.assertEqual([r.id for r in self.db.search_certificates("支付")[0]], [cid])
+		self.db.remove_certificate(cid)
+		self.assertEqual(self.db.search_certificates("支付")[1], 0)
+
+	def test_name_hits_rank_first(self):
+		notes_hit = self.db.add_certificate("api.example.com", "ops@example.com", date(2026, 1, 1), 12, date(2026, 6, 1), "网关")
+		name_hit = self.db.add_certificate("网关证书", "ops@example.com", date(2026, 1, 1), 12, date(2027, 6, 1), None)
+		records, _, _ = self.db.search_certificates("网关")
+		self.assertEqual([r.id for r in records], [name_hit, notes_hit])
+
+	def test_truncated_to_latest_matches(self):
+		ids = _insert(self.db, _rows(SEARCH_RESULT_LIMIT + 5))
+		records, total, truncated = self.db.search_certificates("ops", limit=SEARCH_RESULT_LIMIT + 5)
+		self.assertTrue(truncated)
+		self.assertEqual(total, SEARCH_RESULT_LIMIT)
+		self.assertEqual({r.id for r in records}, set(ids[-SEARCH_RESULT_LIMIT:]))
+
+
+@unittest.skipUnless(os.environ.get("CERTMON_SEARCH_BENCH"), "设置 CERTMON_SEARCH_BENCH=1 运行 10 万行搜索基准")
+class SearchLatencyTest(unittest.TestCase):
+	ROWS = 100_000
+	# 单次搜索（含打开连接）的中位耗时上限，单位毫秒
+	TARGET_MS = 15.0
+
+	@classmethod
+	def setUpClass(cls):
+		cls._tmp = tempfile.TemporaryDirectory()
+		cls.db = Database(str(Path(cls._tmp.name) / "certmon.db"))
+		cls.db.initialize_schema()
+		_insert(cls.db, _rows(cls.ROWS))
+
+	@classmethod
+	def tearDownClass(cls):
+		cls._tmp.cleanup()
+
+	def test_latency(self):
+		for text in ["证", "证书", "负载均衡", "生产 网关", "example", "corp3", "ops12", "证书 corp3", "不存在"]:
+			with self.subTest(text=text):
+				timings = []
+				for _ in range(7):
+					started = time.perf_counter()
+					self.db.search_certificates(text)
+					timings.append((time.perf_counter() - started) * 1000)
+				self.assertLess(statistics.median(timings), self.TARGET_MS)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,48 @@
+import tempfile
+import threading
+import unittest
+from datetime import date
+from pathlib import Path
+
+from certmon.db import Database
+from certmon.snapshot import ReadSnapshot
+
+
+class ReadSnapshotTest(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		path = str(Path(self._tmp.name) / "certmon.db")
+		self.writer = Database(path)
+		self.writer.initialize_schema()
+		self.snapshot = ReadSnapshot(path)
+		self.reader = Database(path, snapshot=self.snapshot)
+
+	def tearDown(self):
+		self._tmp.cleanup()
+
+	def _add(self, name):
+		return self.writer.add_certificate(name, "ops@example.com", date(2026, 1, 1), 12, date(2027, 1, 1), None)
+
+	def test_refreshes_after_write(self):
+		self._add("a.example.com")
+		self.assertEqual([c.name for c in self.reader.list_certificates()], ["a.example.com"])
+		self._add("b.example.com")
+		self.assertEqual(len(self.reader.list_certificates()), 2)
+
+	def test_open_reader_does_not_block_refresh(self):
+		self._add("a.example.com")
+		with self.snapshot.connection() as held:
+			self._add("b.example.com")
+			# 另一线程在旧连接仍打开时触发刷新，不应等待该连接释放
+			result = []
+			worker = threading.Thread(target=lambda: result.append(len(self.reader.list_certificates())))
+			worker.start()
+			worker.join(timeout=5)
+			self.assertFalse(worker.is_alive())
+			self.assertEqual(result, [2])
+			# 已打开的连接继续读取刷新前的副本
+			self.assertEqual(held.execute("SELECT COUNT(*) FROM certificates").fetchone()[0], 1)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,59 @@
+import hashlib
+import ssl
+import unittest
+from datetime import date
+from pathlib import Path
+
+from certmon.x509 import X509ParseError, parse_certificate_bytes, parse_der
+
+DATA = Path(__file__).resolve().parent / "data"
+
+
+class ParseCertificateTest(unittest.TestCase):
+	def setUp(self):
+		self.leaf_pem = (DATA / "leaf.pem").read_bytes()
+		self.ca_pem = (DATA / "ca.pem").read_bytes()
+		self.leaf_der = ssl.PEM_cert_to_DER_cert(self.leaf_pem.decode("ascii"))
+
+	def test_pem(self):
+		info = parse_certificate_bytes(self.leaf_pem)
+		self.assertEqual(info.subject, "certmon-test.local")
+		self.assertEqual(info.not_before, date(2026, 10, 19))
+		# 2050 年以后的时间使用 GeneralizedTime 编码
+		self.assertEqual(info.not_after, date(2126, 9, 25))
+		self.assertEqual(info.fingerprint, hashlib.sha256(self.leaf_der).hexdigest())
+
+	def test_der(self):
+		self.assertEqual(parse_certificate_bytes(self.leaf_der), parse_der(self.leaf_der))
+		self.assertEqual(parse_der(self.leaf_der), parse_certificate_bytes(self.leaf_pem))
+
+	def test_chain_uses_leaf(self):
+		info = parse_certificate_bytes(self.leaf_pem + self.ca_pem)
+		self.assertEqual(info.subject, "certmon-test.local")
+
+	def test_subject_falls_back_to_organization(self):
+		self.assertEqual(parse_certificate_bytes(self.ca_pem).subject, "CertMon Test CA")
+
+	def test_truncated_der(self):
+		for size in (0, 1, 10, len(self.leaf_der) // 2, len(self.leaf_der) - 1):
+			with self.subTest(size=size):
+				with self.assertRaises(X509ParseError):
+					parse_der(self.leaf_der[:size])
+
+	def test_truncated_pem(self):
+		lines = self.leaf_pem.splitlines()
+		truncated = b"\n".join(lines[:5] + [lines[-1]])
+		with self.assertRaises(X509ParseError):
+			parse_certificate_bytes(truncated)
+
+	def test_corrupt_pem_body(self):
+		with self.assertRaises(X509ParseError):
+			parse_certificate_bytes(b"-----BEGIN CERTIFICATE-----\nMIIB!!\n-----END CERTIFICATE-----\n")
+
+	def test_not_a_certificate(self):
+		with self.assertRaises(X509ParseError):
+			parse_certificate_bytes((DATA / "leaf.key").read_bytes())
+
+
+if __name__ == "__main__":
+	unittest.main()